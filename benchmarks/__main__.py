@@ -0,0 +1,162 @@
+"""Usage: python -m benchmarks [names...] [--save results.json] [--compare baseline.json]
+python -m benchmarks --imports
+python -m benchmarks --verify"""
+
+import argparse
+import dataclasses
+import sys
+from typing import Sequence
+
+from . import imports, runner, verify
+from .cases import Config
+
+# small enough to finish in a few seconds, for checking that everything runs
+_QUICK = Config(entries=2000, entry_size=1024, rows=10_000, dat_rows=5000, repeat=3)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    defaults = Config()
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Benchmarks the parsers and writers with synthetic paks and tables.",
+    )
+    parser.add_argument(
+        "names", nargs="*", help="glob patterns of the benchmarks to run (default: all)"
+    )
+    parser.add_argument("--list", action="store_true", help="list the benchmarks")
+    parser.add_argument(
+        "--imports",
+        action="store_true",
+        help="check the import time of the GUI and the command line instead",
+    )
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="check that written tables match the parsed ones byte for byte instead",
+    )
+    parser.add_argument(
+        "--quick", action="store_true", help="use small inputs, overrides the sizes"
+    )
+    parser.add_argument("--entries", type=int, default=defaults.entries)
+    parser.add_argument(
+        "--entry-size",
+        type=int,
+        default=defaults.entry_size,
+        help="mean size of the pak entries in bytes",
+    )
+    parser.add_argument("--rows", type=int, default=defaults.rows, help=".bin rows")
+    parser.add_argument(
+        "--dat-rows", type=int, default=defaults.dat_rows, help=".dat rows"
+    )
+    parser.add_argument("--repeat", type=int, default=defaults.repeat)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--save", metavar="PATH", help="write the results to PATH")
+    parser.add_argument(
+        "--compare",
+        metavar="PATH",
+        help="compare to results saved with --save, fails on regressions",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="fraction a benchmark may be slower than the baseline (default: 0.1)",
+    )
+    args = parser.parse_args(argv)
+
+    if args.imports:
+        return _check_imports(args.repeat)
+    if args.verify:
+        rows = _QUICK.rows if args.quick else args.rows
+        return _verify(rows, args.seed)
+
+    names = runner.select(args.names)
+    if args.list:
+        print("\n".join(names))
+        return 0
+    if not names:
+        parser.error("no benchmark matches the given names")
+
+    if args.quick:
+        config = dataclasses.replace(_QUICK, seed=args.seed)
+    else:
+        config = Config(
+            entries=args.entries,
+            entry_size=args.entry_size,
+            rows=args.rows,
+            dat_rows=args.dat_rows,
+            repeat=args.repeat,
+            seed=args.seed,
+        )
+
+    baseline = {}
+    if args.compare:
+        baseline_config, baseline = runner.load(args.compare)
+        # timings of different inputs can't be compared
+        if dataclasses.replace(baseline_config, repeat=config.repeat) != config:
+            parser.error(
+                f"{args.compare} was recorded with different inputs: {baseline_config}"
+            )
+
+    results = runner.run(
+        names,
+        config,
+        progress=lambda result: print(
+            runner.format_result(result, baseline.get(result.name)), flush=True
+        ),
+    )
+
+    if args.save:
+        runner.save(args.save, config, results)
+
+    found = runner.regressions(results, baseline, args.threshold)
+    if found:
+        print(f"\n{len(found)} regression(s):", file=sys.stderr)
+        for regression in found:
+            print(f"  {regression}", file=sys.stderr)
+        return 1
+
+    return 0
+
+
+def _check_imports(repeat: int) -> int:
+    found = []
+    for startup in imports.STARTUPS:
+        result = imports.measure_import(startup, repeat)
+        print(result, flush=True)
+        found.extend(result.problems)
+
+    if found:
+        print(f"\n{len(found)} problem(s):", file=sys.stderr)
+        for problem in found:
+            print(f"  {problem}", file=sys.stderr)
+        return 1
+
+    return 0
+
+
+def _verify(rows: int, seed: int) -> int:
+    results = [
+        (check.name, lambda check=check: verify.verify(check))
+        for check in verify.checks(rows, seed)
+    ]
+    results.append(("pak.failed_save", lambda: verify.verify_failed_save(seed)))
+
+    found = []
+    for name, run in results:
+        problem = run()
+        print(f"{name:<32} {'ok' if problem is None else 'FAILED'}", flush=True)
+        if problem is not None:
+            found.append(problem)
+
+    if found:
+        print(f"\n{len(found)} problem(s):", file=sys.stderr)
+        for problem in found:
+            print(f"  {problem}", file=sys.stderr)
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+"""The benchmarked operations.
+
+Every case prepares its input outside of the timed code and returns a `Case`,
+whose `run` is timed. Cases are registered with `benchmark` and run in a fresh
+process each, see `runner`.
+"""
+
+import io
+import os
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from pak_editor.parsers.bin_file import iter_bin, parse_bin, serialize_bin
+from pak_editor.parsers.dat_file import iter_dat, parse_dat
+from pak_editor.parsers.directory_cache import DirectoryCache
+from pak_editor.parsers.pak_file import File, PakFile
+
+from .generators import make_bin, make_dat, write_pak
+
+
+@dataclass
+class Config:
+    entries: int = 20_000
+    entry_size: int = 4096
+    rows: int = 100_000
+    dat_rows: int = 50_000
+    repeat: int = 5
+    seed: int = 0
+
+
+@dataclass
+class Case:
+    run: Callable[[], Any]
+    # processed per run, in `unit`s, for the throughput
+    amount: float
+    unit: str
+
+
+@dataclass
+class Workload:
+    """Generated input files, shared by all cases of a run."""
+
+    directory: str
+    config: Config
+
+    @property
+    def pak_path(self) -> str:
+        return os.path.join(self.directory, "synthetic.pak")
+
+    @property
+    def bin_path(self) -> str:
+        return os.path.join(self.directory, "synthetic.bin")
+
+    @property
+    def dat_path(self) -> str:
+        return os.path.join(self.directory, "synthetic.dat")
+
+    def generate(self) -> None:
+        config = self.config
+        write_pak(self.pak_path, config.entries, config.entry_size, config.seed)
+        with open(self.bin_path, "wb") as fp:
+            fp.write(make_bin(config.rows, config.seed))
+        with open(self.dat_path, "wb") as fp:
+            fp.write(make_dat(config.dat_rows, seed=config.seed))
+
+    def read(self, path: str) -> bytes:
+        with open(path, "rb") as fp:
+            return fp.read()
+
+
+BENCHMARKS: dict[str, Callable[[Workload], Case]] = {}
+
+_MB = 1_000_000
+
+
+def benchmark(
+    name: str,
+) -> Callable[[Callable[[Workload], Case]], Callable[[Workload], Case]]:
+    def register(setup: Callable[[Workload], Case]) -> Callable[[Workload], Case]:
+        BENCHMARKS[name] = setup
+        return setup
+
+    return register
+
+
+def _load_and_close(path: str, **kwargs: Any) -> PakFile:
+    pak = PakFile.load(path, **kwargs)
+    pak.close()
+    return pak
+
+
+@benchmark("pak.load")
+def _pak_load(workload: Workload) -> Case:
+    return Case(
+        lambda: _load_and_close(workload.pak_path),
+        workload.config.entries,
+        "entries/s",
+    )
+
+
+@benchmark("pak.load_cached")
+def _pak_load_cached(workload: Workload) -> Case:
+    cache = DirectoryCache(os.path.join(workload.directory, "cache"))
+    # fills the cache
+    _load_and_close(workload.pak_path, cache=cache)
+
+    return Case(
+        lambda: _load_and_close(workload.pak_path, cache=cache),
+        workload.config.entries,
+        "entries/s",
+    )
+
+
+@benchmark("pak.load_eager")
+def _pak_load_eager(workload: Workload) -> Case:
+    return Case(
+        lambda: PakFile.load(workload.pak_path, lazy=False),
+        os.path.getsize(workload.pak_path) / _MB,
+        "MB/s",
+    )
+
+
+@benchmark("pak.save")
+def _pak_save(workload: Workload) -> Case:
+    # a lazily loaded pak, so content is copied from the source file
+    pak = PakFile.load(workload.pak_path)
+    path = os.path.join(workload.directory, "saved.pak")
+
+    return Case(
+        lambda: pak.save_to(path),
+        os.path.getsize(workload.pak_path) / _MB,
+        "MB/s",
+    )
+
+
+@benchmark("pak.save_dedup")
+def _pak_save_dedup(workload: Workload) -> Case:
+    # the generated content is random, this measures the cost of finding duplicates
+    pak = PakFile.load(workload.pak_path)
+    path = os.path.join(workload.directory, "saved.pak")
+
+    return Case(
+        lambda: pak.save_to(path, dedup=True),
+        os.path.getsize(workload.pak_path) / _MB,
+        "MB/s",
+    )
+
+
+@benchmark("pak.pack")
+def _pak_pack(workload: Workload) -> Case:
+    # new files that only exist in memory, like after importing a folder
+    loaded = PakFile.load(workload.pak_path, lazy=False)
+    pak = PakFile(files=[File(name=file.name, data=file.content) for file in loaded])
+
+    return Case(pak.pack, os.path.getsize(workload.pak_path) / _MB, "MB/s")
+
+
+@benchmark("bin.parse")
+def _bin_parse(workload: Workload) -> Case:
+    data = workload.read(workload.bin_path)
+    return Case(lambda: parse_bin(io.BytesIO(data)), workload.config.rows, "rows/s")
+
+
+@benchmark("bin.iter")
+def _bin_iter(workload: Workload) -> Case:
+    def run() -> int:
+        with open(workload.bin_path, "rb") as fp:
+            return sum(len(chunk) for chunk in iter_bin(fp).chunks())
+
+    return Case(run, workload.config.rows, "rows/s")
+
+
+@benchmark("bin.serialize")
+def _bin_serialize(workload: Workload) -> Case:
+    table = parse_bin(io.BytesIO(workload.read(workload.bin_path)))
+    return Case(lambda: serialize_bin(table), workload.config.rows, "rows/s")
+
+
+@benchmark("dat.parse")
+def _dat_parse(workload: Workload) -> Case:
+    data = workload.read(workload.dat_path)
+    return Case(lambda: parse_dat(io.BytesIO(data)), workload.config.dat_rows, "rows/s")
+
+
+@benchmark("dat.iter")
+def _dat_iter(workload: Workload) -> Case:
+    def run() -> int:
+        with open(workload.dat_path, "rb") as fp:
+            return sum(len(chunk) for chunk in iter_dat(fp).chunks())
+
+    return Case(run, workload.config.dat_rows, "rows/s")
@@ -0,0 +1,132 @@
+"""Deterministic synthetic paks and tables.
+
+The generators write the file formats with `struct` directly instead of using the
+parsers' own writers, so a bug in those can't cancel itself out. The same seed
+always gives the same bytes.
+"""
+
+import random
+import struct
+
+from pak_editor.parsers.bin_file import ColumnType
+
+_EXTENSIONS = (".bin", ".dat", ".dds", ".png", ".txt", ".xml")
+
+# values of string columns, repeating like in real tables
+_STRINGS = ("", "#", "none", "sword", "아이템", "검은 용의 비늘", "x" * 200)
+
+
+def pak_entries(count: int, mean_size: int, seed: int = 0) -> list[tuple[str, int]]:
+    """Names and sizes of `count` entries, the sizes are exponentially distributed
+    around `mean_size` like in real paks (lots of small files, few huge ones)."""
+    rnd = random.Random(seed)
+    return [
+        (
+            f"data{idx // 1000:03d}_{idx:07d}{rnd.choice(_EXTENSIONS)}",
+            int(rnd.expovariate(1 / mean_size)) if mean_size else 0,
+        )
+        for idx in range(count)
+    ]
+
+
+def write_pak(path: str, count: int, mean_size: int, seed: int = 0) -> int:
+    """Writes a pak with `count` entries of random content, returns its size."""
+    rnd = random.Random(seed)
+    entries = pak_entries(count, mean_size, seed)
+
+    offset = 4 + 296 * count
+    headers = bytearray(struct.pack("<I", count))
+    for name, size in entries:
+        headers += struct.pack(
+            "<260sII24sI",
+            name.encode("ascii"),
+            offset,
+            size,
+            rnd.randbytes(24),
+            rnd.getrandbits(32),
+        )
+        offset += size
+
+    with open(path, "wb") as fp:
+        fp.write(headers)
+        for _, size in entries:
+            fp.write(rnd.randbytes(size))
+
+    return offset
+
+
+def make_bin(
+    rows: int,
+    seed: int = 0,
+    repeat_columns: int = 2,
+    padded_names: bool = False,
+    string_leftovers: bool = False,
+) -> bytes:
+    """A .bin table with `repeat_columns` columns of every `ColumnType`.
+
+    Quirks of real tables: `padded_names` pads the column names with spaces,
+    `string_leftovers` fills the space after the NUL of strings with random bytes
+    (drawn separately, the table is the same as without them otherwise).
+    """
+    rnd = random.Random(seed)
+    leftovers_rnd = random.Random(seed + 1)
+    c_types = list(ColumnType) * repeat_columns
+
+    out = bytearray()
+    row_struct = struct.Struct(
+        "<L" + "".join(c_type.struct_format for c_type in c_types)
+    )
+    out += struct.pack("<iii", rows, row_struct.size, len(c_types))
+    for idx, c_type in enumerate(c_types):
+        name = f"{c_type.name}_{idx}"
+        if padded_names:
+            name = name.ljust(24)
+        out += struct.pack("<32si", name.encode(), c_type.value)
+
+    strings = {
+        c_type: [
+            string.encode("cp949")
+            for string in _STRINGS
+            if len(string.encode("cp949")) <= c_type.length
+        ]
+        for c_type in c_types
+        if c_type.struct_format.endswith("s")
+    }
+
+    for row in range(rows):
+        values: list[object] = [row]
+        for c_type in c_types:
+            if c_type == ColumnType.integer:
+                values.append(rnd.randint(-(2**31), 2**31 - 1))
+            elif c_type == ColumnType.float:
+                values.append(rnd.uniform(-1e5, 1e5))
+            elif c_type == ColumnType.bool:
+                values.append(rnd.getrandbits(1))
+            else:
+                value = rnd.choice(strings[c_type])
+                if string_leftovers and len(value) < c_type.length:
+                    value += b"\x00" + leftovers_rnd.randbytes(
+                        c_type.length - len(value) - 1
+                    )
+                values.append(value)
+        out += row_struct.pack(*values)
+
+    return bytes(out)
+
+
+def make_dat(rows: int, columns: int = 12, seed: int = 0) -> bytes:
+    """A tab separated, utf-16 encoded .dat table."""
+    rnd = random.Random(seed)
+
+    lines = ["\t".join(f"column_{idx}" for idx in range(columns))]
+    for _ in range(rows):
+        lines.append(
+            "\t".join(
+                rnd.choice(_STRINGS) if idx % 2 else str(rnd.randint(0, 99999))
+                for idx in range(columns)
+            )
+        )
+    # the last line of .dat files isn't a row
+    lines.append("")
+
+    return "".join(f"{line}\r\n" for line in lines).encode("utf-16")
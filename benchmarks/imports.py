@@ -0,0 +1,113 @@
+"""Checks how long importing the GUI and the command line interface takes.
+
+The editor is the default program for .pak files, so it's started again for every
+pak that is opened. Dependencies that are only needed for some files or actions
+(Pillow for images, xlsxwriter for Excel exports, ...) are imported on first use
+and must not be imported at startup.
+"""
+
+import re
+import subprocess
+import sys
+from dataclasses import dataclass, field
+
+# `python -X importtime` lines: "import time: self [us] | cumulative | name"
+_IMPORT_TIME = re.compile(r"^import time:\s+\d+ \|\s+(\d+) \| ( *)(\S+)$")
+
+
+@dataclass
+class Startup:
+    name: str
+    module: str
+    # milliseconds the import may take at most
+    budget: float
+    # top-level packages that must not be imported
+    deferred: tuple[str, ...]
+
+
+STARTUPS = [
+    Startup(
+        "gui",
+        "pak_editor.gui.main_window",
+        budget=200,
+        deferred=(
+            "PIL",
+            "humanize",
+            "xlsxwriter",
+            "pyarrow",
+            "sqlite3",
+            "multiprocessing",
+        ),
+    ),
+    Startup(
+        "cli",
+        "pak_editor.cli",
+        budget=60,
+        deferred=(
+            "PySide6",
+            "PIL",
+            "humanize",
+            "xlsxwriter",
+            "pyarrow",
+            "multiprocessing",
+        ),
+    ),
+]
+
+
+@dataclass
+class ImportResult:
+    startup: Startup
+    # milliseconds, the best of all runs
+    time: float
+    # all modules that were imported
+    modules: set[str] = field(repr=False)
+
+    @property
+    def problems(self) -> list[str]:
+        found = []
+        if self.time > self.startup.budget:
+            found.append(
+                f"{self.startup.name}: importing {self.startup.module} took "
+                f"{self.time:.1f} ms, the budget is {self.startup.budget:.0f} ms"
+            )
+
+        imported = {module.split(".")[0] for module in self.modules}
+        for package in self.startup.deferred:
+            if package in imported:
+                found.append(
+                    f"{self.startup.name}: {package} is imported at startup, import "
+                    "it where it's used instead"
+                )
+        return found
+
+    def __str__(self) -> str:
+        return (
+            f"{self.startup.name:<20} {self.time:>9.1f} ms "
+            f"(budget {self.startup.budget:.0f} ms, {len(self.modules)} modules)"
+        )
+
+
+def measure_import(startup: Startup, repeat: int = 5) -> ImportResult:
+    """Imports `startup.module` in `repeat` new interpreters."""
+    times = []
+    modules: set[str] = set()
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {startup.module}"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stderr
+
+        for line in output.splitlines():
+            match = _IMPORT_TIME.match(line)
+            if match is None:
+                continue
+
+            cumulative, indent, module = match.groups()
+            modules.add(module)
+            if not indent and module == startup.module:
+                times.append(int(cumulative) / 1000)
+
+    return ImportResult(startup, min(times), modules)
@@ -0,0 +1,200 @@
+"""Runs the cases in `cases` and compares their results to a saved baseline."""
+
+import dataclasses
+import fnmatch
+import gc
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import get_context
+from typing import Any, Callable, Iterable, TypeVar
+
+from .cases import BENCHMARKS, Config, Workload
+
+try:
+    import resource
+except ImportError:
+    # not available on Windows, peak RSS isn't reported there
+    resource = None  # type: ignore
+
+T = TypeVar("T")
+
+
+@dataclass
+class Result:
+    name: str
+    unit: str
+    # seconds per run
+    median: float
+    best: float
+    # `unit`s per second, based on the median
+    throughput: float
+    # bytes, of the whole process including the prepared input
+    peak_rss: int | None
+    # bytes allocated at most during one run, as traced by tracemalloc
+    alloc_peak: int
+    # memory blocks still allocated after a run, i.e. held by its result
+    retained_blocks: int
+
+
+def select(patterns: Iterable[str]) -> list[str]:
+    """Names of the benchmarks matching any of the glob `patterns`, all without."""
+    patterns = list(patterns)
+    if not patterns:
+        return list(BENCHMARKS)
+
+    return [
+        name
+        for name in BENCHMARKS
+        if any(fnmatch.fnmatchcase(name, pattern) for pattern in patterns)
+    ]
+
+
+def measure(name: str, workload: Workload) -> Result:
+    """Runs a single benchmark, in the current process."""
+    case = BENCHMARKS[name](workload)
+
+    # warms up caches, the page cache for the input files in particular
+    case.run()
+
+    times = []
+    for _ in range(workload.config.repeat):
+        start = time.perf_counter()
+        case.run()
+        times.append(time.perf_counter() - start)
+    times.sort()
+    median = times[len(times) // 2]
+
+    gc.collect()
+    blocks = sys.getallocatedblocks()
+    tracemalloc.start()
+    try:
+        result = case.run()
+        _, alloc_peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    gc.collect()
+    retained_blocks = sys.getallocatedblocks() - blocks
+    del result
+
+    return Result(
+        name=name,
+        unit=case.unit,
+        median=median,
+        best=times[0],
+        throughput=case.amount / median if median else 0.0,
+        peak_rss=_peak_rss(),
+        alloc_peak=alloc_peak,
+        retained_blocks=retained_blocks,
+    )
+
+
+def run(
+    names: Iterable[str],
+    config: Config,
+    progress: Callable[[Result], None] | None = None,
+) -> list[Result]:
+    """Generates the input files and runs the benchmarks, each in a new process so
+    their peak RSS doesn't include the previous ones."""
+    results = []
+    with tempfile.TemporaryDirectory(prefix="pak-editor-benchmarks-") as directory:
+        workload = Workload(directory, config)
+        # children start with the peak RSS of this process (it's kept across exec on
+        # linux), so this process shouldn't hold the generated files either
+        _in_new_process(workload.generate)
+
+        for name in names:
+            result = _in_new_process(measure, name, workload)
+
+            results.append(result)
+            if progress is not None:
+                progress(result)
+
+    return results
+
+
+def save(path: str, config: Config, results: list[Result]) -> None:
+    with open(path, "w", encoding="utf-8") as fp:
+        json.dump(
+            {
+                "config": dataclasses.asdict(config),
+                "python": sys.version,
+                "platform": platform.platform(),
+                "results": [dataclasses.asdict(result) for result in results],
+            },
+            fp,
+            indent=4,
+        )
+
+
+def load(path: str) -> tuple[Config, dict[str, Result]]:
+    with open(path, encoding="utf-8") as fp:
+        data: dict[str, Any] = json.load(fp)
+
+    return Config(**data["config"]), {
+        result["name"]: Result(**result) for result in data["results"]
+    }
+
+
+def regressions(
+    results: list[Result], baseline: dict[str, Result], threshold: float
+) -> list[str]:
+    """Describes every result that is more than `threshold` (a fraction) slower or
+    allocates more than its baseline. Peak RSS is too noisy to compare."""
+    found = []
+    for result in results:
+        previous = baseline.get(result.name)
+        if previous is None:
+            continue
+
+        if result.median > previous.median * (1 + threshold):
+            found.append(
+                f"{result.name}: {_ratio(result.median, previous.median)} slower "
+                f"({previous.median * 1000:.1f} -> {result.median * 1000:.1f} ms)"
+            )
+        if result.alloc_peak > previous.alloc_peak * (1 + threshold):
+            found.append(
+                f"{result.name}: allocates {_ratio(result.alloc_peak, previous.alloc_peak)} "
+                f"more ({_mb(previous.alloc_peak)} -> {_mb(result.alloc_peak)})"
+            )
+
+    return found
+
+
+def format_result(result: Result, previous: Result | None = None) -> str:
+    text = (
+        f"{result.name:<20} {result.median * 1000:>9.1f} ms "
+        f"{result.throughput:>14,.0f} {result.unit:<10} "
+        f"rss {_mb(result.peak_rss):>9}  alloc {_mb(result.alloc_peak):>9}  "
+        f"retained {result.retained_blocks:>8} blocks"
+    )
+    if previous is not None:
+        text += f"  {previous.median / result.median if result.median else 0:.2f}x"
+    return text
+
+
+def _in_new_process(function: Callable[..., T], *args: Any) -> T:
+    with ProcessPoolExecutor(1, mp_context=get_context("spawn")) as executor:
+        return executor.submit(function, *args).result()
+
+
+def _peak_rss() -> int | None:
+    if resource is None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes everywhere but on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _ratio(value: float, previous: float) -> str:
+    return f"{value / previous - 1:.0%}" if previous else "infinitely"
+
+
+def _mb(value: int | None) -> str:
+    return "-" if value is None else f"{value / 1_000_000:.1f} MB"
@@ -0,0 +1,100 @@
+"""Checks that writers reproduce what the parsers read, using the generated tables.
+
+`serialize_bin` has to give back the original bytes of unchanged tables. The one
+exception are the bytes after the NUL of strings, which aren't part of the value:
+those are written as zeros, which `expected` accounts for.
+
+`verify_failed_save` checks that a pak whose save failed can still be used.
+"""
+
+import io
+import os
+import tempfile
+from dataclasses import dataclass
+from unittest import mock
+
+from pak_editor.parsers.bin_file import parse_bin, serialize_bin
+from pak_editor.parsers.pak_file import File, PakFile
+
+from .generators import make_bin, write_pak
+
+
+@dataclass
+class Check:
+    name: str
+    data: bytes
+    # what writing the parsed data has to give
+    expected: bytes
+
+
+def checks(rows: int, seed: int = 0) -> list[Check]:
+    plain = make_bin(rows, seed)
+    padded = make_bin(rows, seed, padded_names=True)
+    return [
+        Check("bin.roundtrip", plain, plain),
+        Check("bin.roundtrip_padded_names", padded, padded),
+        Check(
+            "bin.roundtrip_string_leftovers",
+            make_bin(rows, seed, padded_names=True, string_leftovers=True),
+            padded,
+        ),
+    ]
+
+
+def verify(check: Check) -> str | None:
+    """Describes how the output differs from `check.expected`, None if it doesn't."""
+    output = serialize_bin(parse_bin(io.BytesIO(check.data)))
+    if output == check.expected:
+        return None
+
+    if len(output) != len(check.expected):
+        return (
+            f"{check.name}: wrote {len(output)} bytes, expected {len(check.expected)}"
+        )
+
+    offset = next(
+        idx for idx, (a, b) in enumerate(zip(output, check.expected)) if a != b
+    )
+    return f"{check.name}: output differs from the expected bytes at offset {offset}"
+
+
+def verify_failed_save(seed: int = 0) -> str | None:
+    """Saves a lazily loaded pak over its own file while replacing the file fails,
+    like on Windows when another process has it open. Describes what's broken
+    afterwards, None if the pak can still be read and saved."""
+    with tempfile.TemporaryDirectory(prefix="pak-editor-verify-") as directory:
+        path = os.path.join(directory, "failed_save.pak")
+        write_pak(path, 20, 256, seed)
+
+        pak = PakFile.load(path)
+        try:
+            contents = [file.content for file in pak]
+            pak.replace(File(name="added.txt", data=b"added"))
+
+            error = PermissionError("the pak is open in another process")
+            with mock.patch("os.replace", side_effect=error):
+                try:
+                    pak.save_to(path)
+                except PermissionError:
+                    pass
+                else:
+                    return (
+                        "pak.failed_save: save_to didn't raise the error of os.replace"
+                    )
+
+            try:
+                if [file.content for file in pak][: len(contents)] != contents:
+                    return "pak.failed_save: content changed after the failed save"
+                pak.save_to(path)
+            except (OSError, ValueError) as e:
+                return (
+                    f"pak.failed_save: the pak is unusable after the failed save: {e}"
+                )
+        finally:
+            pak.close()
+
+        if len(PakFile.load(path, lazy=False)) != len(contents) + 1:
+            return "pak.failed_save: saving again didn't write all files"
+        if len(os.listdir(directory)) != 1:
+            return "pak.failed_save: the temporary file was left behind"
+    return None
@@ -2,9 +2,18 @@ import sys
 
 from PySide6 import QtWidgets
 
-from pak_editor import PakEditorApp
+from pak_editor import PakEditorApp, profiling
 
 if __name__ == "__main__":
+    if getattr(sys, "frozen", False):
+        # the search index scans paks in worker processes, which start this
+        # executable again, they have to run the worker instead of the editor
+        import multiprocessing
+
+        multiprocessing.freeze_support()
+
+    profiling.enable_from_environment()
+
     app = QtWidgets.QApplication(sys.argv)
     window = PakEditorApp()
     window.show()
@@ -1,3 +1,17 @@
-from .gui.main_window import PakEditorApp
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .gui.main_window import PakEditorApp
 
 __all__ = ["PakEditorApp"]
+
+
+def __getattr__(name: str):
+    # The GUI (and with it Qt) is only imported when it's actually used, so the
+    # command line interface and the parsers work without a display
+    if name == "PakEditorApp":
+        from .gui.main_window import PakEditorApp
+
+        return PakEditorApp
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
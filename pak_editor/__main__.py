@@ -0,0 +1,5 @@
+import sys
+
+from pak_editor.cli import main
+
+sys.exit(main())
@@ -0,0 +1,433 @@
+"""Command line interface for batch operations on .pak files.
+
+Only uses the parsers, so it works without a display and doesn't import Qt.
+"""
+
+import argparse
+import fnmatch
+import os
+import sqlite3
+import sys
+from typing import Sequence
+
+from pak_editor import profiling
+from pak_editor.diff import diff_paks, write_patch
+from pak_editor.export import export_files
+from pak_editor.parsers import TABLE_EXTENSIONS, iter_bin, iter_dat
+from pak_editor.parsers.pak_file import File, PakFile
+from pak_editor.search_index import SearchIndex, find_paks
+from pak_editor.table_export import FORMATS, export_table, format_from_path
+
+
+class CliError(Exception):
+    pass
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = build_parser()
+
+    # argparse doesn't pick up positionals that come after an option
+    # (`extract data.pak -o out "*.dds"`), so leftover patterns are added manually
+    args, rest = parser.parse_known_args(argv)
+    if rest:
+        if not hasattr(args, "patterns") or any(arg.startswith("-") for arg in rest):
+            parser.error(f"unrecognized arguments: {' '.join(rest)}")
+        args.patterns.extend(rest)
+
+    profiling.enable_from_environment()
+    if args.profile or args.trace:
+        profiling.enable(args.trace)
+
+    try:
+        args.func(args)
+    except CliError as e:
+        print(f"{parser.prog}: error: {e}", file=sys.stderr)
+        return 1
+    except BrokenPipeError:
+        # output was piped into something like `head`, which stopped reading
+        sys.stderr.close()
+        return 0
+
+    if profiling.is_enabled():
+        for span in profiling.spans():
+            print(f"profile: {span.summary()}", file=sys.stderr)
+
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="pak-editor",
+        description="Batch operations on Florensia .pak files.",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="print how long loading, parsing, saving, etc. took",
+    )
+    parser.add_argument(
+        "--trace",
+        metavar="PATH",
+        help="write the timings as a Chrome trace (chrome://tracing, ui.perfetto.dev)",
+    )
+    subparsers = parser.add_subparsers(required=True, metavar="command")
+
+    list_parser = subparsers.add_parser("list", help="list the files inside a pak")
+    list_parser.add_argument("pak")
+    list_parser.add_argument(
+        "patterns", nargs="*", metavar="pattern", help="glob patterns to filter by"
+    )
+    list_parser.add_argument(
+        "-l",
+        "--long",
+        action="store_true",
+        help="also show offset, length and checksum",
+    )
+    list_parser.set_defaults(func=_list)
+
+    extract_parser = subparsers.add_parser("extract", help="extract files from a pak")
+    extract_parser.add_argument("pak")
+    extract_parser.add_argument(
+        "patterns", nargs="*", metavar="pattern", help="glob patterns to filter by"
+    )
+    extract_parser.add_argument(
+        "-o", "--output", default=".", help="output folder (default: %(default)s)"
+    )
+    extract_parser.add_argument(
+        "-j", "--jobs", type=int, default=None, help="amount of writer threads"
+    )
+    extract_parser.add_argument(
+        "--skip-unchanged",
+        action="store_true",
+        help="don't overwrite files that already exist with the same content",
+    )
+    extract_parser.set_defaults(func=_extract)
+
+    pack_parser = subparsers.add_parser(
+        "pack", help="create a new pak from files and folders"
+    )
+    pack_parser.add_argument("output")
+    pack_parser.add_argument(
+        "inputs",
+        nargs="+",
+        metavar="input",
+        help="files, or folders whose files are added",
+    )
+    pack_parser.add_argument(
+        "--dedup",
+        action="store_true",
+        help="store files with identical content only once",
+    )
+    pack_parser.set_defaults(func=_pack)
+
+    replace_parser = subparsers.add_parser(
+        "replace", help="add files to a pak, replacing files with the same name"
+    )
+    replace_parser.add_argument("pak")
+    replace_parser.add_argument("files", nargs="+", metavar="file")
+    replace_parser.add_argument(
+        "-o", "--output", help="write to a new pak instead of updating it in place"
+    )
+    replace_parser.set_defaults(func=_replace)
+
+    delete_parser = subparsers.add_parser("delete", help="delete files from a pak")
+    delete_parser.add_argument("pak")
+    delete_parser.add_argument(
+        "patterns", nargs="+", metavar="pattern", help="glob patterns to delete"
+    )
+    delete_parser.add_argument(
+        "-o", "--output", help="write to a new pak instead of updating it in place"
+    )
+    delete_parser.set_defaults(func=_delete)
+
+    repack_parser = subparsers.add_parser(
+        "repack", help="rewrite a pak, removing unused space"
+    )
+    repack_parser.add_argument("pak")
+    repack_parser.add_argument(
+        "-o", "--output", help="write to a new pak instead of replacing it"
+    )
+    repack_parser.add_argument(
+        "--dedup",
+        action="store_true",
+        help="store files with identical content only once",
+    )
+    repack_parser.set_defaults(func=_repack)
+
+    diff_parser = subparsers.add_parser(
+        "diff", help="list the files that differ between two versions of a pak"
+    )
+    diff_parser.add_argument("old")
+    diff_parser.add_argument("new")
+    diff_parser.add_argument(
+        "--deep",
+        action="store_true",
+        help="also compare the content of files with the same length and checksum",
+    )
+    diff_parser.add_argument(
+        "-o",
+        "--output",
+        help="write the added and modified files of the new pak to a patch pak",
+    )
+    diff_parser.add_argument(
+        "-j", "--jobs", type=int, default=None, help="amount of hashing threads"
+    )
+    diff_parser.set_defaults(func=_diff)
+
+    dump_table_parser = subparsers.add_parser(
+        "dump-table",
+        help="export a .bin or .dat table to excel, json, ndjson, csv or parquet",
+    )
+    dump_table_parser.add_argument(
+        "source", help="a .bin/.dat file, or a pak containing the table"
+    )
+    dump_table_parser.add_argument(
+        "name", nargs="?", help="name of the table inside the pak"
+    )
+    dump_table_parser.add_argument("-o", "--output", required=True)
+    dump_table_parser.add_argument(
+        "-f",
+        "--format",
+        choices=FORMATS,
+        help="output format (default: by the output file extension), parquet "
+        "needs pyarrow",
+    )
+    dump_table_parser.set_defaults(func=_dump_table)
+
+    index_parser = subparsers.add_parser(
+        "index", help="find files and table values across many paks"
+    )
+    index_subparsers = index_parser.add_subparsers(required=True, metavar="action")
+
+    index_update_parser = index_subparsers.add_parser(
+        "update", help="create an index or update it after paks changed"
+    )
+    index_update_parser.add_argument(
+        "index", help="index database, created if it doesn't exist"
+    )
+    index_update_parser.add_argument(
+        "inputs",
+        nargs="+",
+        metavar="input",
+        help="paks, or folders whose paks are indexed",
+    )
+    index_update_parser.add_argument(
+        "--tables",
+        action="store_true",
+        help="also index the text values of .bin and .dat tables",
+    )
+    index_update_parser.add_argument(
+        "-j", "--jobs", type=int, default=None, help="amount of scanning processes"
+    )
+    index_update_parser.set_defaults(func=_index_update)
+
+    index_find_parser = index_subparsers.add_parser(
+        "find", help="find the paks containing files or table values"
+    )
+    index_find_parser.add_argument("index")
+    index_find_parser.add_argument(
+        "pattern", help="file name or glob pattern, case is ignored"
+    )
+    index_find_parser.add_argument(
+        "--values",
+        action="store_true",
+        help="search table values instead of file names (needs --tables when updating)",
+    )
+    index_find_parser.add_argument(
+        "--limit", type=int, default=1000, help="maximum amount of results"
+    )
+    index_find_parser.set_defaults(func=_index_find)
+
+    return parser
+
+
+def _load(path: str) -> PakFile:
+    try:
+        return PakFile.load(path)
+    except (OSError, ValueError) as e:
+        raise CliError(f"failed to read {path!r}: {e}") from e
+
+
+def _matches(name: str, patterns: Sequence[str]) -> bool:
+    # no patterns selects everything
+    if not patterns:
+        return True
+
+    name = name.lower()
+    return any(fnmatch.fnmatchcase(name, pattern.lower()) for pattern in patterns)
+
+
+def _save(pak: PakFile, path: str, output: str | None) -> None:
+    if output is None:
+        pak.save_incremental(path)
+    else:
+        pak.save_to(output)
+
+
+def _list(args: argparse.Namespace) -> None:
+    pak = _load(args.pak)
+
+    for file in pak:
+        if not _matches(file.name, args.patterns):
+            continue
+
+        if args.long:
+            print(
+                f"{file.offset:>12} {file.size:>12} {file.checksum_1:>10} {file.name}"
+            )
+        else:
+            print(file.name)
+
+
+def _extract(args: argparse.Namespace) -> None:
+    pak = _load(args.pak)
+
+    files = [file for file in pak if _matches(file.name, args.patterns)]
+    if not files:
+        raise CliError("no files matched")
+
+    stats = export_files(
+        files,
+        args.output,
+        workers=args.jobs,
+        skip_unchanged=args.skip_unchanged,
+    )
+    print(stats, file=sys.stderr)
+
+
+def _read_inputs(inputs: Sequence[str]) -> list[File]:
+    files: list[File] = []
+
+    for path in inputs:
+        if os.path.isdir(path):
+            with os.scandir(path) as entries:
+                files.extend(
+                    File.from_path(entry.path)
+                    for entry in sorted(entries, key=lambda entry: entry.name)
+                    if entry.is_file()
+                )
+        elif os.path.isfile(path):
+            files.append(File.from_path(path))
+        else:
+            raise CliError(f"{path!r} doesn't exist")
+
+    return files
+
+
+def _pack(args: argparse.Namespace) -> None:
+    files = _read_inputs(args.inputs)
+    if not files:
+        raise CliError("no files to pack")
+
+    PakFile(files=files).save_to(args.output, dedup=args.dedup)
+
+
+def _replace(args: argparse.Namespace) -> None:
+    pak = _load(args.pak)
+    pak.replace_many(_read_inputs(args.files))
+
+    _save(pak, args.pak, args.output)
+
+
+def _delete(args: argparse.Namespace) -> None:
+    pak = _load(args.pak)
+
+    removed = pak.remove_many(
+        [file.name for file in pak if _matches(file.name, args.patterns)]
+    )
+    if not removed:
+        raise CliError("no files matched")
+    _save(pak, args.pak, args.output)
+
+
+def _repack(args: argparse.Namespace) -> None:
+    pak = _load(args.pak)
+    pak.save_to(args.output or args.pak, dedup=args.dedup)
+
+
+def _diff(args: argparse.Namespace) -> None:
+    old = _load(args.old)
+    new = _load(args.new)
+
+    diff = diff_paks(old, new, deep=args.deep, workers=args.jobs)
+    for line in diff.report():
+        print(line)
+    print(diff, file=sys.stderr)
+
+    if args.output:
+        if not diff.changed:
+            raise CliError("no added or modified files, no patch written")
+        write_patch(diff, args.output)
+        if diff.removed:
+            print(
+                f"{args.output} can't remove files, {len(diff.removed)} removed "
+                "file(s) have to be deleted separately",
+                file=sys.stderr,
+            )
+
+
+def _dump_table(args: argparse.Namespace) -> None:
+    file: File | None = None
+    if args.name is None:
+        name = os.path.basename(args.source)
+    else:
+        pak = _load(args.source)
+        matches = [file for file in pak if file.name.lower() == args.name.lower()]
+        if not matches:
+            raise CliError(f"{args.name!r} not found in {args.source!r}")
+        file = matches[0]
+        name = file.name
+
+    if not name.lower().endswith(TABLE_EXTENSIONS):
+        raise CliError(f"{name!r} is not a .bin or .dat file")
+
+    format_ = args.format or format_from_path(args.output)
+    if format_ is None:
+        raise CliError("can't tell the output format, use --format")
+
+    try:
+        # tables are streamed, so their size doesn't matter
+        with open(args.source, "rb") if file is None else file.open() as fp:
+            reader = iter_bin(fp) if name.lower().endswith(".bin") else iter_dat(fp)
+            if not reader:
+                raise CliError(f"{name!r} has no rows")
+            stats = export_table(args.output, reader, format_)
+    except CliError:
+        raise
+    except Exception as e:
+        raise CliError(f"failed to export {name!r}: {e}") from e
+
+    print(f"{args.output}: {stats}", file=sys.stderr)
+
+
+def _open_index(path: str) -> SearchIndex:
+    try:
+        return SearchIndex(path)
+    except sqlite3.Error as e:
+        raise CliError(f"failed to open index {path!r}: {e}") from e
+
+
+def _index_update(args: argparse.Namespace) -> None:
+    paths = find_paks(args.inputs)
+    if not paths:
+        raise CliError("no paks found")
+
+    with _open_index(args.index) as index:
+        stats = index.update(paths, tables=args.tables, workers=args.jobs)
+
+    for path, error in stats.failed.items():
+        print(f"{path}: {error}", file=sys.stderr)
+    print(stats, file=sys.stderr)
+
+
+def _index_find(args: argparse.Namespace) -> None:
+    with _open_index(args.index) as index:
+        if args.values:
+            for value in index.find_values(args.pattern, limit=args.limit):
+                print(
+                    f"{value.pak}: {value.file} row {value.row + 1}, "
+                    f"{value.column}: {value.value}"
+                )
+        else:
+            for file in index.find_files(args.pattern, limit=args.limit):
+                print(f"{file.pak}: {file.name}")
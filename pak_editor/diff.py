@@ -0,0 +1,158 @@
+"""Compares two versions of a pak, e.g. the client paks before and after an update.
+
+Entries are matched by name. Entries whose length differs changed, entries with the
+same length and the same (non-zero) `checksum_1` are assumed to be unchanged. Only
+the content of the remaining entries is read and hashed, so comparing two lazily
+loaded paks reads just the entries that might differ.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from pak_editor import profiling
+from pak_editor.parsers.pak_file import File, PakFile, ProgressCallback
+
+
+@dataclass
+class PakDiff:
+    # in the order of the new pak
+    added: list[File] = field(default_factory=list)
+    # old and new version of the entry
+    modified: list[tuple[File, File]] = field(default_factory=list)
+    # in the order of the old pak
+    removed: list[File] = field(default_factory=list)
+    unchanged: int = 0
+    # content read to compare entries with the same length
+    compared_bytes: int = 0
+    seconds: float = 0.0
+
+    # added and modified entries, in the order of the new pak
+    changed: list[File] = field(default_factory=list, repr=False)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.modified or self.removed)
+
+    def __str__(self) -> str:
+        return (
+            f"{len(self.added)} added, {len(self.modified)} modified, "
+            f"{len(self.removed)} removed, {self.unchanged} unchanged "
+            f"({self.compared_bytes / 1_000_000:.1f} MB compared in {self.seconds:.2f}s)"
+        )
+
+    def report(self) -> list[str]:
+        """One line per changed entry, like `git diff --name-status`."""
+        lines = [f"A\t{file.name}" for file in self.added]
+        lines.extend(
+            f"M\t{new.name}\t{old.size} -> {new.size} bytes"
+            for old, new in self.modified
+        )
+        lines.extend(f"D\t{file.name}" for file in self.removed)
+        return lines
+
+
+def diff_paks(
+    old: PakFile,
+    new: PakFile,
+    deep: bool = False,
+    workers: int | None = None,
+    progress: ProgressCallback | None = None,
+) -> PakDiff:
+    """Compares the entries of `old` and `new`.
+
+    With `deep`, the content of entries with the same length and checksum is
+    compared as well, in case the checksum doesn't cover everything. Content is
+    hashed using a pool of `workers` threads, `progress` is called with the amount
+    of bytes compared.
+    """
+    with profiling.span("pak.diff") as span:
+        start = time.perf_counter()
+        result = PakDiff()
+
+        unchanged: set[str] = set()
+        # entries with the same length whose content needs to be compared
+        candidates: list[tuple[File, File]] = []
+        for file in new:
+            previous = old.get(file.name)
+            if previous is None or previous.size != file.size:
+                continue
+
+            checksum = _checksum(file)
+            if not deep and checksum is not None and checksum == _checksum(previous):
+                unchanged.add(file.name)
+            else:
+                candidates.append((previous, file))
+
+        same_contents = _same_contents(candidates, workers, progress)
+        for (_, file), same in zip(candidates, same_contents):
+            result.compared_bytes += file.size
+            if same:
+                unchanged.add(file.name)
+
+        for file in new:
+            previous = old.get(file.name)
+            if previous is None:
+                result.added.append(file)
+            elif file.name in unchanged:
+                result.unchanged += 1
+                continue
+            else:
+                result.modified.append((previous, file))
+            result.changed.append(file)
+
+        result.removed = [file for file in old if file.name not in new]
+        result.seconds = time.perf_counter() - start
+        span.add(compared_bytes=result.compared_bytes)
+        return result
+
+
+def write_patch(
+    diff: PakDiff, path: str, progress: ProgressCallback | None = None
+) -> PakFile:
+    """Saves the added and modified entries of `diff` as a new pak at `path`.
+
+    Paks can't express removed entries, those are only part of the report.
+    """
+    patch = PakFile(files=diff.changed)
+    patch.save_to(path, progress)
+    return patch
+
+
+def _checksum(file: File) -> int | None:
+    # only known for untouched files read from a pak, files written by this editor
+    # get 0 since we don't know how it's calculated
+    if file.modified or file.data is not None or not file.checksum_1:
+        return None
+    return file.checksum_1
+
+
+def _same_contents(
+    pairs: list[tuple[File, File]],
+    workers: int | None,
+    progress: ProgressCallback | None,
+) -> list[bool]:
+    if not pairs:
+        return []
+
+    total = sum(file.size for _, file in pairs)
+    done = 0
+    same = []
+
+    # hashing releases the GIL, so the threads run in parallel
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        try:
+            results = executor.map(
+                lambda pair: pair[0].digest() == pair[1].digest(), pairs
+            )
+            for (_, file), is_same in zip(pairs, results):
+                same.append(is_same)
+
+                done += file.size
+                if progress is not None:
+                    progress(done, total)
+        except BaseException:
+            # doesn't wait for entries that haven't started when progress aborted
+            executor.shutdown(cancel_futures=True)
+            raise
+
+    return same
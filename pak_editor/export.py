@@ -0,0 +1,139 @@
+import hashlib
+import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Sequence
+
+from pak_editor import profiling
+from pak_editor.parsers.pak_file import File, ProgressCallback
+
+# Files are handed to the worker threads in batches of roughly this size, so
+# exporting thousands of tiny files isn't dominated by scheduling overhead
+_BATCH_SIZE = 16 * 1024 * 1024
+_BATCH_MAX_FILES = 256
+
+
+@dataclass
+class ExportStats:
+    files: int = 0
+    bytes: int = 0
+    skipped: int = 0
+    seconds: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """Written bytes per second."""
+        return self.bytes / self.seconds if self.seconds else 0.0
+
+    def __str__(self) -> str:
+        text = (
+            f"{self.files} file(s), {self.bytes / 1_000_000:.1f} MB in "
+            f"{self.seconds:.2f}s ({self.throughput / 1_000_000:.1f} MB/s)"
+        )
+        if self.skipped:
+            text += f", {self.skipped} unchanged file(s) skipped"
+        return text
+
+
+def export_files(
+    files: Sequence[File],
+    directory: str,
+    workers: int | None = None,
+    skip_unchanged: bool = False,
+    progress: ProgressCallback | None = None,
+) -> ExportStats:
+    """Writes `files` into `directory` using a pool of `workers` threads.
+
+    With `skip_unchanged`, files that already exist with the same size and content
+    are not written again. `progress` is called with the amount of bytes handled.
+    """
+    with profiling.span("export", files=len(files)) as span:
+        start = time.perf_counter()
+
+        paths = [os.path.join(directory, file.name) for file in files]
+        for parent in {os.path.dirname(path) for path in paths}:
+            os.makedirs(parent, exist_ok=True)
+
+        stats = ExportStats()
+        total = sum(file.size for file in files)
+        done = 0
+
+        executor = ThreadPoolExecutor(max_workers=workers)
+        try:
+            futures: dict[Future[tuple[int, int, int]], int] = {}
+            for batch in _batches(list(zip(files, paths))):
+                future = executor.submit(_export_batch, batch, skip_unchanged)
+                futures[future] = sum(file.size for file, _ in batch)
+
+            for future in as_completed(futures):
+                written_files, written_bytes, skipped = future.result()
+                stats.files += written_files
+                stats.bytes += written_bytes
+                stats.skipped += skipped
+
+                done += futures[future]
+                if progress is not None:
+                    progress(done, total)
+        finally:
+            # doesn't wait for batches that haven't started when progress aborted the export
+            executor.shutdown(cancel_futures=True)
+
+        stats.seconds = time.perf_counter() - start
+        span.add(bytes=stats.bytes, skipped=stats.skipped)
+        return stats
+
+
+def _batches(items: list[tuple[File, str]]) -> list[list[tuple[File, str]]]:
+    batches: list[list[tuple[File, str]]] = []
+    batch: list[tuple[File, str]] = []
+    batch_size = 0
+
+    for file, path in items:
+        batch.append((file, path))
+        batch_size += file.size
+
+        if batch_size >= _BATCH_SIZE or len(batch) >= _BATCH_MAX_FILES:
+            batches.append(batch)
+            batch = []
+            batch_size = 0
+
+    if batch:
+        batches.append(batch)
+
+    return batches
+
+
+def _export_batch(
+    batch: list[tuple[File, str]],
+    skip_unchanged: bool,
+) -> tuple[int, int, int]:
+    written_files = 0
+    written_bytes = 0
+    skipped = 0
+
+    for file, path in batch:
+        if skip_unchanged and _is_unchanged(file, path):
+            skipped += 1
+            continue
+
+        with open(path, "wb") as fp:
+            file.write_to(fp)
+
+        written_files += 1
+        written_bytes += file.size
+
+    return written_files, written_bytes, skipped
+
+
+def _is_unchanged(file: File, path: str) -> bool:
+    try:
+        if os.path.getsize(path) != file.size:
+            return False
+
+        with open(path, "rb") as fp:
+            existing = hashlib.file_digest(fp, hashlib.blake2b).digest()
+    except OSError:
+        return False
+
+    return file.digest() == existing
@@ -0,0 +1,159 @@
+from typing import Sequence
+
+from PySide6 import QtCore
+
+from pak_editor.parsers.pak_file import File, PakFile
+
+
+class NameIndex:
+    """Case-insensitive substring search over file names.
+
+    While typing, every query contains the previous one, so only the previous
+    matches have to be searched again instead of all names.
+    """
+
+    def __init__(self, names: Sequence[str]) -> None:
+        self._names = [name.lower() for name in names]
+        self._last_text = ""
+        self._last_matches: list[int] | None = None
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def search(self, text: str) -> list[int]:
+        """Positions of all names containing `text`, in order."""
+        text = text.lower()
+        if not text:
+            return list(range(len(self._names)))
+
+        names = self._names
+        if self._last_matches is not None and self._last_text in text:
+            matches = [i for i in self._last_matches if text in names[i]]
+        else:
+            matches = [i for i, name in enumerate(names) if text in name]
+
+        self._last_text = text
+        self._last_matches = matches
+        return matches
+
+
+def extension(name: str) -> str:
+    # same as os.path.splitext, but a lot faster for big paks
+    dot = name.rfind(".")
+    return name[dot:].lower() if dot > 0 else ""
+
+
+class FileListModel(QtCore.QStringListModel):
+    """The names of the files of a pak, filtered by a search text and an extension.
+
+    A string list model, so views don't have to call into python for every row when
+    laying out big paks. Changes to the pak are applied as row inserts and removals
+    (see `sync`), so views keep their selection and scroll position.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._pak: PakFile | None = None
+        self._files: list[File] = []
+        self._extensions: list[str] = []
+        self._index = NameIndex([])
+
+        self._text = ""
+        self._extension: str | None = None
+        # files that pass the filter, in the same order as the rows
+        self._rows: list[File] = []
+
+    @property
+    def pak(self) -> PakFile | None:
+        return self._pak
+
+    def file(self, row: int) -> File:
+        return self._rows[row]
+
+    def row_of(self, file: File) -> int | None:
+        for row, candidate in enumerate(self._rows):
+            if candidate is file:
+                return row
+        return None
+
+    def extensions(self) -> list[str]:
+        """Extensions of the files in the pak, for choosing a filter."""
+        return sorted(set(self._extensions))
+
+    def set_pak(self, pak: PakFile | None) -> None:
+        self._pak = pak
+        self._build_index()
+        self._set_rows(self._filter())
+
+    def set_filter(self, text: str, extension: str | None) -> None:
+        if (text, extension) == (self._text, self._extension):
+            return
+
+        self._text = text
+        self._extension = extension
+        # resetting is a lot faster than removing rows one by one for big paks
+        self._set_rows(self._filter())
+
+    def sync(self) -> None:
+        """Updates the rows after files were added, replaced or removed from the pak."""
+        self._build_index()
+        rows = self._filter()
+
+        names = {file.name for file in rows}
+        self._remove_rows(
+            [row for row, file in enumerate(self._rows) if file.name not in names]
+        )
+
+        # files only get added at the end or replaced in place, so the remaining
+        # rows are in the same order as the new ones and only gaps need to be filled
+        row = 0
+        while row < len(rows):
+            if row < len(self._rows) and self._rows[row].name == rows[row].name:
+                row += 1
+                continue
+
+            end = row + 1
+            if row < len(self._rows):
+                name = self._rows[row].name
+                while end < len(rows) and rows[end].name != name:
+                    end += 1
+
+            self.insertRows(row, end - row)
+            self._rows[row:row] = rows[row:end]
+            for inserted in range(row, end):
+                self.setData(self.index(inserted), rows[inserted].name)
+            row = end
+
+        if len(self._rows) != len(rows):
+            # the order changed after all
+            self._set_rows(rows)
+        else:
+            # replaced files keep their row
+            self._rows = rows
+
+    def _build_index(self) -> None:
+        self._files = list(self._pak) if self._pak is not None else []
+        self._extensions = [extension(file.name) for file in self._files]
+        self._index = NameIndex([file.name for file in self._files])
+
+    def _filter(self) -> list[File]:
+        positions = self._index.search(self._text)
+        if self._extension is not None:
+            positions = [i for i in positions if self._extensions[i] == self._extension]
+        return [self._files[i] for i in positions]
+
+    def _set_rows(self, rows: list[File]) -> None:
+        self._rows = rows
+        self.setStringList([file.name for file in rows])
+
+    def _remove_rows(self, rows: list[int]) -> None:
+        # removes consecutive rows at once, starting at the end so the rows before
+        # keep their numbers
+        while rows:
+            last = rows.pop()
+            first = last
+            while rows and rows[-1] == first - 1:
+                first = rows.pop()
+
+            self.removeRows(first, last - first + 1)
+            del self._rows[first : last + 1]
@@ -1,40 +1,155 @@
-from typing import cast
-
 from PySide6 import QtCore, QtWidgets
 
 from pak_editor.parsers.pak_file import File, PakFile
 
+from .file_list_model import FileListModel
 
-class PakListWidgetItem(QtWidgets.QListWidgetItem):
-    def __init__(self, file: File) -> None:
-        super().__init__(file.name)
-        self._file = file
 
-    @property
-    def file(self) -> File:
-        return self._file
+class FileListWidget(QtWidgets.QWidget):
+    """List of the files in a pak with a search box and an extension filter."""
 
+    current_file_changed = QtCore.Signal(object)
+    file_double_clicked = QtCore.Signal(object)
+    context_menu_requested = QtCore.Signal(QtCore.QPoint)
 
-class FileListWidget(QtWidgets.QListWidget):
     def __init__(self) -> None:
         super().__init__()
-        self.setSelectionMode(
+
+        layout = QtWidgets.QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.setLayout(layout)
+
+        filter_layout = QtWidgets.QHBoxLayout()
+        layout.addLayout(filter_layout)
+
+        self._search_edit = QtWidgets.QLineEdit()
+        self._search_edit.setPlaceholderText("Search")
+        self._search_edit.setClearButtonEnabled(True)
+        self._search_edit.textChanged.connect(self._update_filter)
+        filter_layout.addWidget(self._search_edit)
+
+        self._extension_combo_box = QtWidgets.QComboBox()
+        self._extension_combo_box.setSizeAdjustPolicy(
+            QtWidgets.QComboBox.SizeAdjustPolicy.AdjustToContents
+        )
+        self._extension_combo_box.currentIndexChanged.connect(self._update_filter)
+        filter_layout.addWidget(self._extension_combo_box)
+
+        self._model = FileListModel()
+        self._current_file: File | None = None
+
+        self._view = QtWidgets.QListView()
+        # only the visible rows are measured and drawn, no matter how big the pak is
+        self._view.setUniformItemSizes(True)
+        self._view.setSelectionMode(
             QtWidgets.QAbstractItemView.SelectionMode.ExtendedSelection
         )
-        self.setContextMenuPolicy(QtCore.Qt.ContextMenuPolicy.CustomContextMenu)
-        self.itemSelectionChanged.connect(self.get_selected_files)
+        # the model is a string list, which would allow renaming files otherwise
+        self._view.setEditTriggers(
+            QtWidgets.QAbstractItemView.EditTrigger.NoEditTriggers
+        )
+        self._view.setContextMenuPolicy(QtCore.Qt.ContextMenuPolicy.CustomContextMenu)
+        self._view.setModel(self._model)
+        self._view.selectionModel().currentChanged.connect(self._on_current_changed)
+        self._view.doubleClicked.connect(
+            lambda index: self.file_double_clicked.emit(self._model.file(index.row()))
+        )
+        self._view.customContextMenuRequested.connect(self.context_menu_requested)
+        layout.addWidget(self._view)
+
+        self._update_extensions()
 
     def update_pak_data(self, pak: PakFile | None) -> None:
-        self.clear()
+        if pak is not None and pak is self._model.pak:
+            self._model.sync()
+            # the row stays selected when its file was replaced by a new one
+            self._on_current_changed(self._view.currentIndex())
+        else:
+            self._model.set_pak(pak)
+            self._on_current_changed(self._view.currentIndex())
+
+        self._update_extensions()
+
+    def current_file(self) -> File | None:
+        index = self._view.currentIndex()
+        return self._model.file(index.row()) if index.isValid() else None
+
+    def select_file(self, name: str) -> bool:
+        """Makes the file with the given name the current one, clearing filters that
+        hide it. Returns False if the pak doesn't contain such a file."""
+        pak = self._model.pak
+        file = pak.get(name) if pak is not None else None
+        if file is None:
+            return False
 
-        if pak is None:
-            return
+        if self._model.row_of(file) is None:
+            self._search_edit.clear()
+            self._extension_combo_box.setCurrentIndex(0)
 
-        for file in pak.files:
-            item = PakListWidgetItem(file)
-            self.addItem(item)
+        row = self._model.row_of(file)
+        if row is None:
+            return False
+
+        index = self._model.index(row)
+        self._view.setCurrentIndex(index)
+        self._view.scrollTo(
+            index, QtWidgets.QAbstractItemView.ScrollHint.PositionAtCenter
+        )
+        return True
+
+    def neighbour_files(self, count: int) -> list[File]:
+        """Up to `count` files before and after the current one, closest first."""
+        index = self._view.currentIndex()
+        if not index.isValid():
+            return []
+
+        row = index.row()
+        files = []
+        for distance in range(1, count + 1):
+            for neighbour in (row + distance, row - distance):
+                if 0 <= neighbour < self._model.rowCount():
+                    files.append(self._model.file(neighbour))
+
+        return files
 
     def get_selected_files(self) -> list[File]:
-        return [
-            item.file for item in cast(list[PakListWidgetItem], self.selectedItems())
-        ]
+        rows = sorted(index.row() for index in self._view.selectedIndexes())
+        return [self._model.file(row) for row in rows]
+
+    def _update_extensions(self) -> None:
+        current = self._extension_combo_box.currentData()
+        extensions = self._model.extensions()
+
+        self._extension_combo_box.blockSignals(True)
+        self._extension_combo_box.clear()
+        self._extension_combo_box.addItem("All types", None)
+        for extension in extensions:
+            self._extension_combo_box.addItem(extension or "No extension", extension)
+        self._extension_combo_box.setCurrentIndex(
+            max(0, self._extension_combo_box.findData(current))
+        )
+        self._extension_combo_box.blockSignals(False)
+
+        if current is not None and current not in extensions:
+            self._update_filter()
+
+    def _update_filter(self) -> None:
+        current_file = self.current_file()
+        self._model.set_filter(
+            self._search_edit.text(), self._extension_combo_box.currentData()
+        )
+
+        # the model was reset, keep the current file if it's still shown
+        row = self._model.row_of(current_file) if current_file is not None else None
+        if row is not None:
+            self._view.setCurrentIndex(self._model.index(row))
+            self._view.scrollTo(self._model.index(row))
+        else:
+            self._on_current_changed(self._view.currentIndex())
+
+    def _on_current_changed(self, index: QtCore.QModelIndex) -> None:
+        file = self._model.file(index.row()) if index.isValid() else None
+        # resetting the model to filter it re-selects the current file
+        if file is not self._current_file:
+            self._current_file = file
+            self.current_file_changed.emit(file)
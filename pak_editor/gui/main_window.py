@@ -1,25 +1,37 @@
 import os
 import tempfile
-from typing import TYPE_CHECKING, cast
+from typing import TYPE_CHECKING, Callable
 
-import humanize
-import humanize.filesize
 from PySide6 import QtCore, QtGui, QtWidgets
 
+from pak_editor import profiling
 from pak_editor.constants import WINDOW_TITLE
+from pak_editor.export import ExportStats, export_files
+from pak_editor.parsers.directory_cache import DirectoryCache
 from pak_editor.parsers.pak_file import File, PakFile
 from pak_editor.utils import make_asset_path
 
-from .file_list_widget import FileListWidget, PakListWidgetItem
+from .file_list_widget import FileListWidget
 from .pak_file_info_widget import PakFileInfoWidget
 from .preview_widget import PreviewWidget
+from .tasks import Task, TaskManager
 
 if TYPE_CHECKING:
     from pak_editor.parsers.pak_file import File
 
+    from .search_dialog import SearchDialog
+
+
+# previews of this many files before and after the selected one are prefetched
+PREFETCH_NEIGHBOURS = 3
+# recent operations listed in the tooltip of the profiling label
+PROFILE_HISTORY = 20
+
 
 class PakEditorApp(QtWidgets.QMainWindow):
     pak_changed = QtCore.Signal(PakFile)
+    # emitted from the thread that ran the span
+    _span_finished = QtCore.Signal(object)
 
     def __init__(self):
         super().__init__()
@@ -29,6 +41,8 @@ class PakEditorApp(QtWidgets.QMainWindow):
         self.setWindowIcon(QtGui.QIcon(make_asset_path("icon.png")))
 
         self._pak_file = None
+        # reopening paks that didn't change skips parsing their file headers
+        self._directory_cache = DirectoryCache()
 
         self.pak_changed.connect(self._update_window_title)
         self.pak_changed.connect(self._update_status_bar)
@@ -50,6 +64,10 @@ class PakEditorApp(QtWidgets.QMainWindow):
         close_action.setIcon(QtGui.QIcon.fromTheme("edit-clear"))
         close_action.triggered.connect(self._close_pak_file)
 
+        save_action = file_section.addAction("Save")
+        save_action.setIcon(QtGui.QIcon.fromTheme("document-save"))
+        save_action.triggered.connect(self._save_pak_file_in_place)
+
         save_as_action = file_section.addAction("Save as")
         save_as_action.setIcon(QtGui.QIcon.fromTheme("document-save-as"))
         save_as_action.triggered.connect(self._save_pak_file)
@@ -70,6 +88,26 @@ class PakEditorApp(QtWidgets.QMainWindow):
         export_all_files_action.setIcon(QtGui.QIcon.fromTheme("emblem-downloads"))
         export_all_files_action.triggered.connect(self._export_all_files)
 
+        export_section.addSeparator()
+
+        self._skip_unchanged_files_action = export_section.addAction(
+            "Skip unchanged files"
+        )
+        self._skip_unchanged_files_action.setCheckable(True)
+        self._skip_unchanged_files_action.setToolTip(
+            "Don't overwrite files that already exist with the same content"
+        )
+
+        search_section = menu_bar.addMenu("Search")
+
+        search_paks_action = search_section.addAction("Search in paks...")
+        search_paks_action.setIcon(QtGui.QIcon.fromTheme("edit-find"))
+        search_paks_action.setShortcut(QtGui.QKeySequence("Ctrl+Shift+F"))
+        search_paks_action.triggered.connect(self._show_search_dialog)
+
+        # created when it's opened for the first time
+        self._search_dialog: "SearchDialog | None" = None
+
         self._status_bar = QtWidgets.QStatusBar()
         self.setStatusBar(self._status_bar)
 
@@ -77,22 +115,33 @@ class PakEditorApp(QtWidgets.QMainWindow):
         self._status_bar_file_count_label = QtWidgets.QLabel()
         self._status_bar_filesize_label = QtWidgets.QLabel()
 
+        # timings of the last operation, only when profiling is enabled
+        self._profile_label = QtWidgets.QLabel()
+        self._profile_history: list[str] = []
+        self._profile_listener = self._span_finished.emit
+        if profiling.is_enabled():
+            self._status_bar.addPermanentWidget(self._profile_label)
+            self._span_finished.connect(self._show_span)
+            profiling.add_listener(self._profile_listener)
+
+        self._tasks = TaskManager(self._status_bar)
+        self._tasks.running_changed.connect(self._on_task_running_changed)
+
         main_splitter = QtWidgets.QSplitter()
         self.setCentralWidget(main_splitter)
 
         self._file_list_widget = FileListWidget()
-        self._file_list_widget.currentItemChanged.connect(
-            self._on_file_list_item_changed
+        self._file_list_widget.current_file_changed.connect(
+            self._on_current_file_changed
         )
-        self._file_list_widget.itemDoubleClicked.connect(
-            lambda item: self._open_pak_content_file_with_default_app(
-                cast(PakListWidgetItem, item).file
-            )
+        self._file_list_widget.file_double_clicked.connect(
+            self._open_pak_content_file_with_default_app
         )
-        self._file_list_widget.customContextMenuRequested.connect(
+        self._file_list_widget.context_menu_requested.connect(
             self._on_file_list_context_menu
         )
         self.pak_changed.connect(self._file_list_widget.update_pak_data)
+        self.pak_changed.connect(self._update_current_file_infos)
         main_splitter.addWidget(self._file_list_widget)
 
         vertical_splitter = QtWidgets.QSplitter(QtCore.Qt.Orientation.Vertical)
@@ -118,13 +167,49 @@ class PakEditorApp(QtWidgets.QMainWindow):
         self._status_bar_file_count_label.show()
         self._status_bar_filesize_label.show()
 
-        self._status_bar_file_count_label.setText(f"{len(pak_file.files)} file(s)")
+        self._status_bar_file_count_label.setText(f"{len(pak_file)} file(s)")
+
+        import humanize.filesize
 
-        total_file_size = sum([len(file.content) for file in pak_file.files])
+        total_file_size = sum([file.size for file in pak_file])
         self._status_bar_filesize_label.setText(
             humanize.filesize.naturalsize(total_file_size, binary=False)
         )
 
+    def _show_span(self, span: profiling.Span) -> None:
+        summary = span.summary()
+        self._profile_history = [summary, *self._profile_history][:PROFILE_HISTORY]
+        self._profile_label.setToolTip("\n".join(self._profile_history))
+
+        # prefetching runs in the background, it would replace what the user did
+        if span.name != "preview.prefetch":
+            self._profile_label.setText(summary)
+
+    def closeEvent(self, event: QtGui.QCloseEvent) -> None:
+        if profiling.is_enabled():
+            profiling.remove_listener(self._profile_listener)
+        super().closeEvent(event)
+
+    def _on_task_running_changed(self, running: bool) -> None:
+        # the pak can't be changed while it is loaded, saved or exported
+        self.menuBar().setEnabled(not running)
+        self.centralWidget().setEnabled(not running)
+        self.setAcceptDrops(not running)
+
+    def _set_pak_file(self, pak_file: PakFile | None) -> None:
+        previous_pak_file = self._pak_file
+
+        # previews that are still being decoded might read from the previous pak
+        self._preview_widget.wait_for_pending()
+
+        self._pak_file = pak_file
+        self.pak_changed.emit(self._pak_file)
+
+        # content of the previous pak is no longer shown anywhere, so its mapping can go
+        if previous_pak_file is not None and previous_pak_file is not pak_file:
+            previous_pak_file.close()
+            self._preview_widget.cache.clear()
+
     def _update_window_title(self, pak_file: PakFile | None) -> None:
         if pak_file is None or pak_file.original_file_name is None:
             self.setWindowTitle(WINDOW_TITLE)
@@ -133,19 +218,22 @@ class PakEditorApp(QtWidgets.QMainWindow):
         title = f"{WINDOW_TITLE} - {pak_file.original_file_name}"
         self.setWindowTitle(title)
 
-    def _on_file_list_item_changed(
-        self,
-        new_item: PakListWidgetItem | None,
-        previous: PakListWidgetItem | None,
-    ) -> None:
-        if new_item is None:
+    def _on_current_file_changed(self, file: "File | None") -> None:
+        if file is None:
             self._info_widget.clear_infos()
             self._preview_widget.clear_preview()
         else:
-            file = new_item.file
-
             self._info_widget.update_infos(file)
             self._preview_widget.preview_file(file)
+            self._preview_widget.prefetch(
+                self._file_list_widget.neighbour_files(PREFETCH_NEIGHBOURS)
+            )
+
+    def _update_current_file_infos(self, pak_file: PakFile | None) -> None:
+        # offsets change when the pak is saved, while the file stays selected
+        file = self._file_list_widget.current_file()
+        if file is not None:
+            self._info_widget.update_infos(file)
 
     def _on_file_list_context_menu(self, point: QtCore.QPoint) -> None:
         if self._pak_file is None:
@@ -177,8 +265,8 @@ class PakEditorApp(QtWidgets.QMainWindow):
 
         def delete_action() -> None:
             assert self._pak_file is not None
-            for file in files:
-                self._pak_file.files.remove(file)
+            removed = self._pak_file.remove_many([file.name for file in files])
+            self._preview_widget.cache.evict(file.name for file in removed)
             self.pak_changed.emit(self._pak_file)
 
         delete_file = menu.addAction("Delete files" if is_multiple_files else "Delete")
@@ -187,14 +275,25 @@ class PakEditorApp(QtWidgets.QMainWindow):
 
         menu.exec(self.mapToGlobal(point))
 
+    def _show_search_dialog(self) -> None:
+        if self._search_dialog is None:
+            # imported on first use, the search index needs sqlite3 and multiprocessing
+            from .search_dialog import SearchDialog
+
+            self._search_dialog = SearchDialog(self)
+            self._search_dialog.open_file_requested.connect(self.load_pak_file)
+
+        self._search_dialog.show()
+        self._search_dialog.raise_()
+        self._search_dialog.activateWindow()
+
     def _exit_app(self) -> None:
         app = QtWidgets.QApplication.instance()
         if app is not None:
             app.quit()
 
     def _create_new_pak_file(self) -> None:
-        self._pak_file = PakFile(files=[])
-        self.pak_changed.emit(self._pak_file)
+        self._set_pak_file(PakFile(files=[]))
 
     def _ask_open_pak_file(self) -> None:
         path, _ = QtWidgets.QFileDialog.getOpenFileName(
@@ -204,8 +303,7 @@ class PakEditorApp(QtWidgets.QMainWindow):
             self.load_pak_file(path)
 
     def _close_pak_file(self):
-        self._pak_file = None
-        self.pak_changed.emit(self._pak_file)
+        self._set_pak_file(None)
 
     def _save_pak_file(self) -> None:
         if self._pak_file is None:
@@ -216,7 +314,7 @@ class PakEditorApp(QtWidgets.QMainWindow):
             )
             return
 
-        if not self._pak_file.files:
+        if len(self._pak_file) == 0:
             QtWidgets.QMessageBox.warning(
                 self,
                 "Error saving pak file",
@@ -230,15 +328,65 @@ class PakEditorApp(QtWidgets.QMainWindow):
         if not save_path:
             return
 
-        with open(save_path, "wb") as fp:
-            fp.write(self._pak_file.pack())
+        pak_file = self._pak_file
+        # later saves in place go to the new file, not the one that was opened
+        self._run_save(
+            save_path,
+            lambda task: pak_file.save_to(save_path, task.report_progress, rebind=True),
+        )
+
+    def _save_pak_file_in_place(self) -> None:
+        # new paks don't have a file yet, same for the ones that were closed in between
+        if self._pak_file is None or self._pak_file.source is None:
+            self._save_pak_file()
+            return
+
+        if len(self._pak_file) == 0:
+            QtWidgets.QMessageBox.warning(
+                self,
+                "Error saving pak file",
+                "PAK file has no content",
+            )
+            return
+
+        pak_file = self._pak_file
+        save_path = self._pak_file.source.path
+        self._run_save(
+            save_path,
+            lambda task: pak_file.save_incremental(
+                save_path, progress=task.report_progress
+            ),
+        )
+
+    def _run_save(self, save_path: str, save: Callable[[Task], object]) -> None:
+        # saving over the pak's own file replaces the mapping previews read from
+        self._preview_widget.wait_for_pending()
+
+        def on_finished(_) -> None:
+            # offsets change when the pak was saved over its own file
+            self.pak_changed.emit(self._pak_file)
+            self._preview_current_file()
+
+            QtWidgets.QMessageBox.information(
+                self,
+                "Saved successfully",
+                f"PAK file was saved successfully to {save_path!r}",
+            )
+
+        def on_failed(e: Exception) -> None:
+            self._preview_current_file()
+            QtWidgets.QMessageBox.critical(self, "Error saving pak file", str(e))
 
-        QtWidgets.QMessageBox.information(
-            self,
-            "Saved successfully",
-            f"PAK file was saved successfully to {save_path!r}",
+        self._tasks.run(
+            f"Saving {os.path.basename(save_path)}...", save, on_finished, on_failed
         )
 
+    def _preview_current_file(self) -> None:
+        # waiting for pending previews cleared the preview of the selected file
+        file = self._file_list_widget.current_file()
+        if file is not None:
+            self._preview_widget.preview_file(file)
+
     def _open_pak_content_file_with_default_app(self, file: "File") -> None:
         with tempfile.TemporaryDirectory(
             prefix="florensia-pak-editor-",
@@ -265,33 +413,74 @@ class PakEditorApp(QtWidgets.QMainWindow):
             )
             return
 
+        self._export_files(selected_files)
+
+    def _export_all_files(self) -> None:
+        if self._pak_file is None:
+            QtWidgets.QMessageBox.warning(
+                self, "Error exporting files", "No PAK file opened"
+            )
+            return
+
+        # also the files that are hidden by the search
+        self._export_files(list(self._pak_file))
+
+    def _export_files(self, files: list[File]) -> None:
         path = QtWidgets.QFileDialog.getExistingDirectory(
             self, "Select an export folder"
         )
         if not path:
             return
 
-        for file in selected_files:
-            with open(os.path.join(path, file.name), "wb") as fp:
-                fp.write(file.content)
+        skip_unchanged = self._skip_unchanged_files_action.isChecked()
+
+        def on_finished(stats: ExportStats) -> None:
+            QtWidgets.QMessageBox.information(
+                self,
+                "File export",
+                f"{stats} exported successfully to {path!r}",
+            )
 
-        QtWidgets.QMessageBox.information(
-            self,
-            "File export",
-            f"{len(selected_files)} file(s) exported successfully to {path!r}",
+        def on_failed(e: Exception) -> None:
+            QtWidgets.QMessageBox.critical(self, "Error exporting files", str(e))
+
+        self._tasks.run(
+            "Exporting files...",
+            lambda task: export_files(
+                files,
+                path,
+                skip_unchanged=skip_unchanged,
+                progress=task.report_progress,
+            ),
+            on_finished,
+            on_failed,
         )
 
-    def _export_all_files(self) -> None:
-        self._file_list_widget.selectAll()
-        self._export_selected_files()
-
-    def load_pak_file(self, path: str) -> None:
-        try:
-            self._pak_file = PakFile.load(path)
-        except Exception as e:
-            self._pak_file = None
+    def load_pak_file(self, path: str, select: str | None = None) -> None:
+        """Loads the pak at `path` in the background, `select` is the name of a file
+        in it to select once it's loaded."""
+        if self._tasks.is_running:
+            QtWidgets.QMessageBox.warning(
+                self, "Error reading .pak file", "Another operation is still running"
+            )
+            return
+
+        def on_failed(e: Exception) -> None:
+            self._set_pak_file(None)
             QtWidgets.QMessageBox.critical(self, "Error reading .pak file", str(e))
-        self.pak_changed.emit(self._pak_file)
+
+        def on_finished(pak_file: PakFile) -> None:
+            self._set_pak_file(pak_file)
+            if select is not None:
+                self._file_list_widget.select_file(select)
+
+        cache = self._directory_cache
+        self._tasks.run(
+            f"Loading {os.path.basename(path)}...",
+            lambda task: PakFile.load(path, progress=task.report_progress, cache=cache),
+            on_finished,
+            on_failed,
+        )
 
     def dragEnterEvent(self, event: QtGui.QDragEnterEvent) -> None:
         if self._pak_file is not None and event.mimeData().hasUrls():
@@ -304,11 +493,7 @@ class PakEditorApp(QtWidgets.QMainWindow):
 
         urls = event.mimeData().urls()
         new_files: list[File] = [File.from_path(url.toLocalFile()) for url in urls]
-        new_filenames = [f.name for f in new_files]
-
-        for file in self._pak_file.files:
-            if file.name in new_filenames:
-                self._pak_file.files.remove(file)
 
-        self._pak_file.files.extend(new_files)
+        replaced = self._pak_file.replace_many(new_files)
+        self._preview_widget.cache.evict(file.name for file in replaced)
         self.pak_changed.emit(self._pak_file)
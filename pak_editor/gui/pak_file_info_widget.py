@@ -3,7 +3,8 @@ from typing import TYPE_CHECKING
 from PySide6 import QtCore, QtGui, QtWidgets
 
 from pak_editor.parsers.pak_file import File
-from pak_editor.utils import clear_layout
+
+from .utils import clear_layout
 
 if TYPE_CHECKING:
     from pak_editor.parsers.pak_file import File
@@ -0,0 +1,106 @@
+import hashlib
+import os
+import sys
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Iterable
+
+from .preview_decoder import (
+    IMAGE_EXTENSIONS,
+    ImagePreview,
+    Preview,
+    TablePreview,
+    TextPreview,
+)
+
+if TYPE_CHECKING:
+    from pak_editor.parsers.pak_file import File
+
+
+# name of the file first, followed by values that identify its content
+PreviewKey = tuple[Any, ...]
+
+
+def preview_key(file: "File", image_size: int | None = None) -> PreviewKey:
+    """Identifies the content of `file` (and the size images are decoded at),
+    equal keys mean the same preview."""
+    if file.data is None and file.source is not None:
+        # unchanged content inside a pak, identified by where it is stored
+        key: PreviewKey = (file.name, file.source.id, file.offset, file.length)
+    else:
+        key = (file.name, hashlib.blake2b(file.content, digest_size=16).digest())
+
+    if os.path.splitext(file.name)[1].lower() in IMAGE_EXTENSIONS:
+        key += (image_size,)
+    return key
+
+
+def estimate_size(preview: Preview) -> int:
+    """Rough amount of memory used by `preview` in bytes."""
+    if isinstance(preview, TextPreview):
+        return sys.getsizeof(preview.text)
+    elif isinstance(preview, (ImagePreview, TablePreview)):
+        return preview.size_in_bytes()
+    else:
+        raise ValueError(f"unknown preview: {preview!r}")
+
+
+class PreviewCache:
+    """Least recently used cache of decoded previews, limited by their estimated size."""
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024) -> None:
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        self._entries: OrderedDict[PreviewKey, tuple[Preview, int]] = OrderedDict()
+        self._size = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: PreviewKey) -> bool:
+        return key in self._entries
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def get(self, key: PreviewKey) -> Preview | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key: PreviewKey, preview: Preview) -> None:
+        size = estimate_size(preview)
+        # previews that would push out everything else aren't worth it
+        if size > self.max_bytes // 4:
+            return
+
+        self._remove(key)
+        self._entries[key] = (preview, size)
+        self._size += size
+
+        while self._size > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+
+    def evict(self, names: Iterable[str]) -> None:
+        """Drops all previews of files with the given names, e.g. after they were
+        replaced or deleted."""
+        names = set(names)
+        for key in [key for key in self._entries if key[0] in names]:
+            self._remove(key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._size = 0
+
+    def _remove(self, key: PreviewKey) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= entry[1]
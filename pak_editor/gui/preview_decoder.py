@@ -0,0 +1,157 @@
+import os
+import sys
+from array import array
+from dataclasses import dataclass, field
+from io import BytesIO
+from typing import TYPE_CHECKING
+
+from PySide6 import QtGui
+
+from pak_editor import profiling
+from pak_editor.parsers import TABLE_EXTENSIONS, parse_table
+from pak_editor.parsers.dds import extract_mip_level
+from pak_editor.parsers.table import Table
+
+if TYPE_CHECKING:
+    from pak_editor.parsers.pak_file import File
+
+IMAGE_EXTENSIONS = (".png", ".jpeg", ".jpg", ".bmp", ".tga", ".dds")
+
+
+@dataclass
+class TextPreview:
+    text: str
+
+
+@dataclass
+class ImagePreview:
+    image: QtGui.QImage
+    # size of the image before it was scaled down for previewing
+    full_size: tuple[int, int]
+    _pixmap: QtGui.QPixmap | None = field(default=None, repr=False)
+
+    def pixmap(self) -> QtGui.QPixmap:
+        """Converts the image into a pixmap, which is kept instead of the image
+        afterwards. Pixmaps can only be created on the GUI thread."""
+        if self._pixmap is None:
+            with profiling.span("image.to_pixmap"):
+                self._pixmap = QtGui.QPixmap.fromImage(self.image)
+            self.image = QtGui.QImage()
+        return self._pixmap
+
+    def size_in_bytes(self) -> int:
+        if self._pixmap is not None:
+            return self._pixmap.width() * self._pixmap.height() * 4
+        return self.image.sizeInBytes()
+
+    @property
+    def is_reduced(self) -> bool:
+        if self._pixmap is not None:
+            size = (self._pixmap.width(), self._pixmap.height())
+        else:
+            size = (self.image.width(), self.image.height())
+        return size != self.full_size
+
+
+@dataclass
+class TablePreview:
+    data: Table
+    # estimated while decoding, counting it on the GUI thread would block it for big
+    # tables with unique strings
+    _size: int = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        size = 0
+        for column in self.data.columns:
+            raw = getattr(column, "raw", column)
+            if isinstance(raw, (array, bytes)):
+                size += len(raw) * (raw.itemsize if isinstance(raw, array) else 1)
+            else:
+                # list of pointers plus the values, each object counted once since
+                # repeating values are decoded into the same object
+                distinct = {id(value): value for value in raw}
+                size += len(raw) * 8 + sum(map(sys.getsizeof, distinct.values()))
+        self._size = size
+
+    def size_in_bytes(self) -> int:
+        return self._size
+
+
+Preview = TextPreview | ImagePreview | TablePreview
+
+
+def decode_image(file: "File", max_size: int | None = None) -> ImagePreview:
+    """Decodes the image in `file`, scaled down to fit into `max_size` x `max_size`.
+
+    Only as much of the image is decoded as needed where the format allows it:
+    the smallest big enough mip level of DDS textures and JPEG's draft mode.
+    """
+    # Pillow takes a while to import, it's only loaded once the first image is shown
+    from PIL import Image
+    from PIL.ImageQt import ImageQt
+
+    content = file.content
+    image = Image.open(BytesIO(content))
+    full_size = image.size
+
+    if max_size is not None and max(full_size) > max_size:
+        if image.format == "DDS":
+            level = extract_mip_level(content, max_size)
+            if level is not None:
+                image = Image.open(BytesIO(level))
+
+        # uses draft mode for JPEGs and reduce() before resampling otherwise
+        with profiling.span("image.thumbnail"):
+            image.thumbnail((max_size, max_size))
+
+    with profiling.span("image.to_qimage") as span:
+        qimage = ImageQt(image)
+        span.add(pixels=qimage.width() * qimage.height())
+
+    return ImagePreview(qimage, full_size)
+
+
+def decode_preview(file: "File", image_size: int | None = None) -> Preview:
+    """Decodes the content of `file` for previewing, images are scaled down to fit
+    into `image_size`. Doesn't create any widgets, so it can run off the GUI thread."""
+    name, ext = os.path.splitext(file.name)
+    ext = ext.lower()
+
+    if ext in (".txt", ".xml"):
+        # try the first encoding that doesn't error out, no idea what AHA did with some of the files..
+        encodings = ("euc_kr", "utf-8", "utf-16", "cp1252")
+        content = file.content
+        for encoding in encodings:
+            try:
+                text = content.decode(encoding)
+                break
+            except UnicodeDecodeError:
+                continue
+        else:
+            text = f"Failed to decode text using any of the following encodings: {encodings!r}"
+
+        return TextPreview(text)
+
+    elif ext in IMAGE_EXTENSIONS:
+        try:
+            return decode_image(file, image_size)
+        except Exception as e:
+            return TextPreview(f"Failed to open image: {str(e)}")
+
+    elif ext in TABLE_EXTENSIONS:
+        try:
+            data = parse_table(file)
+        except Exception as e:
+            return TextPreview(f"Failed to parse file: {str(e)}")
+
+        return TablePreview(data)
+    else:
+        return TextPreview("No preview available")
+
+
+def decode_preview_safely(file: "File", image_size: int | None = None) -> Preview:
+    with profiling.span("preview.decode", bytes=file.size):
+        try:
+            return decode_preview(file, image_size)
+        except Exception as e:
+            return TextPreview(f"Failed to preview file: {str(e)}")
@@ -0,0 +1,114 @@
+from typing import TYPE_CHECKING
+
+from PySide6 import QtCore
+
+from pak_editor import profiling
+
+from .preview_cache import PreviewCache, PreviewKey, preview_key
+from .preview_decoder import Preview, decode_preview_safely
+from .tasks import Task
+
+if TYPE_CHECKING:
+    from pak_editor.parsers.pak_file import File
+
+
+class PreviewPrefetcher(QtCore.QObject):
+    """Decodes previews of files the user is likely to select next into a cache.
+
+    Prefetching starts once the selection didn't change for `idle_delay` ms and runs
+    on a single low priority thread. Files bigger than `max_file_size` are skipped,
+    at most `max_bytes` (by default an eighth of the cache) of files are prefetched
+    at once. The cache evicts the least recently used previews to make room.
+    """
+
+    def __init__(
+        self,
+        cache: PreviewCache,
+        idle_delay: int = 250,
+        max_file_size: int = 32 * 1024 * 1024,
+        max_bytes: int | None = None,
+    ) -> None:
+        super().__init__()
+        self._cache = cache
+        self.max_file_size = max_file_size
+        self.max_bytes = cache.max_bytes // 8 if max_bytes is None else max_bytes
+
+        self._pool = QtCore.QThreadPool()
+        self._pool.setMaxThreadCount(1)
+        self._pool.setThreadPriority(QtCore.QThread.Priority.LowPriority)
+
+        self._tasks: list[Task] = []
+        self._files: list["File"] = []
+        self._image_size: int | None = None
+        self._generation = 0
+
+        self._timer = QtCore.QTimer()
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(idle_delay)
+        self._timer.timeout.connect(self._start)
+
+    def schedule(self, files: list["File"], image_size: int | None = None) -> None:
+        """Prefetches `files` (most likely next selection first) once the user is idle,
+        images are decoded at `image_size`."""
+        self.cancel()
+        self._files = files
+        self._image_size = image_size
+        self._timer.start()
+
+    def cancel(self) -> None:
+        self._generation += 1
+        self._timer.stop()
+        self._files = []
+
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        self._pool.clear()
+
+    def wait_for_pending(self) -> None:
+        self.cancel()
+        self._pool.waitForDone()
+
+    def _start(self) -> None:
+        generation = self._generation
+        image_size = self._image_size
+        # not limited by the free space of the cache, which stays full once enough
+        # files were previewed
+        budget = self.max_bytes
+
+        for file in self._files:
+            if file.size > self.max_file_size:
+                continue
+
+            key = preview_key(file, image_size)
+            if key in self._cache:
+                continue
+
+            # the decoded size is unknown until it's decoded, the file size has to do
+            budget -= file.size
+            if budget < 0:
+                break
+
+            task = Task(
+                lambda task, file=file, key=key: (
+                    generation,
+                    key,
+                    _prefetch(file, image_size),
+                )
+            )
+            task.signals.finished.connect(self._store)
+            self._tasks.append(task)
+            self._pool.start(task)
+
+        self._files = []
+
+    def _store(self, result: tuple[int, PreviewKey, Preview]) -> None:
+        generation, key, preview = result
+        if generation == self._generation:
+            self._cache.put(key, preview)
+
+
+def _prefetch(file: "File", image_size: int | None) -> Preview:
+    # its own span, so prefetched previews can be told apart from the selected one
+    with profiling.span("preview.prefetch"):
+        return decode_preview_safely(file, image_size)
@@ -1,39 +1,88 @@
-import os
-from io import BytesIO, StringIO
 from typing import TYPE_CHECKING, Any
 
-from PIL import Image
-from PIL.ImageQt import ImageQt
 from PySide6 import QtCore, QtGui, QtWidgets
 
-from pak_editor.parsers.bin_file import parse_bin
-from pak_editor.parsers.dat_file import parse_dat
-from pak_editor.utils import clear_layout, dump_to_excel, dump_to_json
+from pak_editor import profiling
+from pak_editor.parsers.table import Table
+from pak_editor.table_export import export_table
+
+from .preview_cache import PreviewCache, PreviewKey, preview_key
+from .preview_decoder import (
+    ImagePreview,
+    Preview,
+    TextPreview,
+    decode_preview_safely,
+)
+from .preview_prefetcher import PreviewPrefetcher
+from .tasks import Task
+from .utils import clear_layout
 
 if TYPE_CHECKING:
     from pak_editor.parsers.pak_file import File
 
 
-class PreviewTable(QtWidgets.QTableWidget):
-    def __init__(self, data: list[dict[str, Any]]) -> None:
+# Only this many rows are looked at when sizing the columns of a table preview
+COLUMN_WIDTH_SAMPLE_ROWS = 100
+
+# Images are decoded at the size of the preview area rounded up to a power of two,
+# so resizing the window doesn't invalidate cached previews, but at least this big
+MIN_IMAGE_PREVIEW_SIZE = 256
+
+
+class TableModel(QtCore.QAbstractTableModel):
+    """Exposes a parsed table to a view, cells are only formatted once they are shown."""
+
+    def __init__(self, data: Table) -> None:
         super().__init__()
         self._data = data
 
-        headers = list(data[0].keys())
+    def rowCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._data)
+
+    def columnCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._data.names)
+
+    def data(
+        self, index: QtCore.QModelIndex, role: int = QtCore.Qt.ItemDataRole.DisplayRole
+    ) -> Any:
+        if not index.isValid() or role != QtCore.Qt.ItemDataRole.DisplayRole:
+            return None
+
+        return str(self._data.cell(index.row(), index.column()))
+
+    def headerData(
+        self,
+        section: int,
+        orientation: QtCore.Qt.Orientation,
+        role: int = QtCore.Qt.ItemDataRole.DisplayRole,
+    ) -> Any:
+        if role != QtCore.Qt.ItemDataRole.DisplayRole:
+            return None
+
+        if orientation == QtCore.Qt.Orientation.Horizontal:
+            return self._data.names[section]
+        return str(section + 1)
+
+
+class PreviewTable(QtWidgets.QTableView):
+    def __init__(self, data: Table) -> None:
+        super().__init__()
+        self._data = data
 
         self.setContextMenuPolicy(QtCore.Qt.ContextMenuPolicy.CustomContextMenu)
         self.customContextMenuRequested.connect(self._show_context_menu)
-        self.setColumnCount(len(headers))
-        self.setRowCount(len(data) + 1)
 
-        for x, header in enumerate(headers):
-            self.setItem(0, x, QtWidgets.QTableWidgetItem(header))
+        # all rows have the same height, so the view doesn't need to measure each one
+        self.verticalHeader().setSectionResizeMode(
+            QtWidgets.QHeaderView.ResizeMode.Fixed
+        )
 
-        for y, row in enumerate(data, start=1):
-            for x, header in enumerate(headers):
-                self.setItem(y, x, QtWidgets.QTableWidgetItem(str(row[header])))
+        self._model = TableModel(data)
+        self.setModel(self._model)
 
-        self.resizeColumnsToContents()
+        self.horizontalHeader().setResizeContentsPrecision(COLUMN_WIDTH_SAMPLE_ROWS)
+        with profiling.span("table.resize_columns", columns=len(data.names)):
+            self.resizeColumnsToContents()
 
     def _show_context_menu(self, point: QtCore.QPoint) -> None:
         menu = QtWidgets.QMenu()
@@ -43,20 +92,22 @@ class PreviewTable(QtWidgets.QTableWidget):
         menu.exec(self.mapToGlobal(point))
 
     def _export_table(self) -> None:
-        excel_type = "Excel (*.xlsx)"
-        json_type = "EUC-KR encoded JSON (*.json)"
+        types = {
+            "Excel (*.xlsx)": "xlsx",
+            "EUC-KR encoded JSON (*.json)": "json",
+            "Newline delimited JSON (*.ndjson)": "ndjson",
+            "CSV (*.csv)": "csv",
+            "Parquet, needs pyarrow (*.parquet)": "parquet",
+        }
         path, type_ = QtWidgets.QFileDialog.getSaveFileName(
-            self, "Select save location", filter=";;".join((excel_type, json_type))
+            self, "Select save location", filter=";;".join(types)
         )
 
         if not path:
             return
 
         try:
-            if type_ == excel_type:
-                dump_to_excel(path, self._data)
-            elif type_ == json_type:
-                dump_to_json(path, self._data)
+            export_table(path, self._data, types.get(type_))
         except Exception as e:
             QtWidgets.QMessageBox.critical(
                 self, "Export failed", f"Failed to export file: {str(e)} "
@@ -78,47 +129,94 @@ class PreviewWidget(QtWidgets.QScrollArea):
         self._layout = QtWidgets.QVBoxLayout()
         widget.setLayout(self._layout)
 
-    def preview_file(self, file: "File"):
-        name, ext = os.path.splitext(file.name)
-        ext = ext.lower()
+        # Previews are decoded one at a time in the background. Only the preview of
+        # the most recently selected file is shown, older ones are dropped.
+        self._pool = QtCore.QThreadPool()
+        self._pool.setMaxThreadCount(1)
+        self._task: Task | None = None
+        self._generation = 0
+        self._file: "File | None" = None
 
-        self.clear_preview()
+        self.cache = PreviewCache()
+        self._prefetcher = PreviewPrefetcher(self.cache)
 
-        if ext in (".txt", ".xml"):
-            # try the first encoding that doesn't error out, no idea what AHA did with some of the files..
-            encodings = ("euc_kr", "utf-8", "utf-16", "cp1252")
-            for encoding in encodings:
-                try:
-                    text = file.content.decode(encoding)
-                    break
-                except UnicodeDecodeError:
-                    continue
-            else:
-                text = f"Failed to decode text using any of the following encodings: {encodings!r}"
+    def preview_file(self, file: "File", full_resolution: bool = False) -> None:
+        self.clear_preview()
+        self._file = file
 
-            self._preview_text(text)
+        if full_resolution:
+            # full resolution images can be huge, they are only kept while shown
+            self._decode(file, None, None)
+            return
 
-        elif ext in (".png", ".jpeg", ".jpg", ".bmp", ".tga", ".dds"):
-            image = Image.open(BytesIO(file.content))
-            self._preview_image(image)
+        image_size = self._image_size()
+        key = preview_key(file, image_size)
+        preview = self.cache.get(key)
+        if preview is not None:
+            self._show(preview)
+            return
 
-        elif ext in (".dat", ".bin"):
-            try:
-                if ext == ".bin":
-                    data = parse_bin(BytesIO(file.content))
-                elif ext == ".dat":
-                    data = parse_dat(StringIO(file.content.decode("utf-16")))
-            except Exception as e:
-                self._preview_text(f"Failed to parse file: {str(e)}")
-                return
+        self._decode(file, key, image_size)
 
-            self._preview_table(data)  # type: ignore
-        else:
-            self._preview_text("No preview available")
+    def prefetch(self, files: list["File"]) -> None:
+        """Decodes the previews of `files` in the background, so they are shown
+        instantly once selected."""
+        self._prefetcher.schedule(files, self._image_size())
 
     def clear_preview(self) -> None:
+        self._generation += 1
+        self._file = None
         clear_layout(self._layout)
 
+    def wait_for_pending(self) -> None:
+        """Drops all pending previews and waits for the running one to finish,
+        used before the content of previewed files becomes unavailable."""
+        self.clear_preview()
+        self._pool.clear()
+        self._prefetcher.wait_for_pending()
+        self._pool.waitForDone()
+
+    def _image_size(self) -> int:
+        # not the viewport, that shrinks when scroll bars are shown for some previews
+        size = max(self.width(), self.height(), MIN_IMAGE_PREVIEW_SIZE)
+        return 1 << (size - 1).bit_length()
+
+    def _decode(
+        self, file: "File", key: PreviewKey | None, image_size: int | None
+    ) -> None:
+        generation = self._generation
+        task = Task(
+            lambda task: (generation, key, decode_preview_safely(file, image_size))
+        )
+        task.signals.finished.connect(self._show_preview)
+
+        # previews that haven't started yet would be outdated anyway
+        self._pool.clear()
+        self._task = task
+        self._pool.start(task)
+
+    def _show_preview(self, result: tuple[int, PreviewKey | None, Preview]) -> None:
+        generation, key, preview = result
+        # outdated previews are still cached, the user might come back to them
+        if key is not None:
+            self.cache.put(key, preview)
+
+        if generation != self._generation:
+            return
+
+        self._show(preview)
+
+    def _show(self, preview: Preview) -> None:
+        with profiling.span("preview.show"):
+            clear_layout(self._layout)
+
+            if isinstance(preview, TextPreview):
+                self._preview_text(preview.text)
+            elif isinstance(preview, ImagePreview):
+                self._preview_image(preview)
+            else:
+                self._preview_table(preview.data)
+
     def _preview_text(self, text: str) -> None:
         label = QtWidgets.QLabel(text)
         label.setWordWrap(True)
@@ -129,15 +227,28 @@ class PreviewWidget(QtWidgets.QScrollArea):
         )
         self._layout.addWidget(label)
 
-    def _preview_image(self, image: Image.Image) -> None:
-        qimage = ImageQt(image)
-        pixmap = QtGui.QPixmap.fromImage(qimage)
+    def _preview_image(self, preview: ImagePreview) -> None:
+        if preview.is_reduced:
+            width, height = preview.full_size
+            button = QtWidgets.QPushButton(f"Show full resolution ({width} x {height})")
+            button.setIcon(QtGui.QIcon.fromTheme("zoom-original"))
+            button.clicked.connect(self._show_full_resolution)
+            self._layout.addWidget(button)
 
         label = QtWidgets.QLabel()
-        label.setPixmap(pixmap)
+        label.setPixmap(preview.pixmap())
         self._layout.addWidget(label)
 
-    def _preview_table(self, data: list[dict[str, Any]]) -> None:
+    def _show_full_resolution(self) -> None:
+        file = self._file
+        if file is not None:
+            # the button that was clicked is removed with the preview, which can't
+            # happen while it's still delivering the click
+            QtCore.QTimer.singleShot(
+                0, lambda: self.preview_file(file, full_resolution=True)
+            )
+
+    def _preview_table(self, data: Table) -> None:
         if not data:
             self._preview_text("No rows found in table data")
             return
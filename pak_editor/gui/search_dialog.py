@@ -0,0 +1,243 @@
+import os
+
+from PySide6 import QtCore, QtGui, QtWidgets
+
+from pak_editor.search_index import IndexStats, SearchIndex, find_paks
+
+from .tasks import Task
+
+# Searching stops after this many results, the table would get unwieldy otherwise
+MAX_RESULTS = 1000
+
+
+def default_index_path() -> str:
+    directory = os.path.join(
+        QtCore.QStandardPaths.writableLocation(
+            QtCore.QStandardPaths.StandardLocation.GenericDataLocation
+        ),
+        "florensia-pak-editor",
+    )
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, "search-index.sqlite")
+
+
+class SearchDialog(QtWidgets.QDialog):
+    """Finds files and table values in all paks of a folder, using a `SearchIndex`."""
+
+    # path of the pak and name of the file inside it
+    open_file_requested = QtCore.Signal(str, str)
+
+    def __init__(self, parent: QtWidgets.QWidget | None = None) -> None:
+        super().__init__(parent)
+        self.setWindowTitle("Search in paks")
+        self.resize(800, 500)
+
+        self._settings = QtCore.QSettings("florensia-pak-editor", "pak-editor")
+        self._index_path = default_index_path()
+        self._index = SearchIndex(self._index_path)
+
+        # updating the index runs in the background, searching is fast enough
+        self._pool = QtCore.QThreadPool()
+        self._task: Task | None = None
+
+        layout = QtWidgets.QVBoxLayout()
+        self.setLayout(layout)
+
+        folder_layout = QtWidgets.QHBoxLayout()
+        layout.addLayout(folder_layout)
+
+        self._folder_edit = QtWidgets.QLineEdit(
+            str(self._settings.value("search/folder", ""))
+        )
+        self._folder_edit.setPlaceholderText("Folder containing .pak files")
+        folder_layout.addWidget(self._folder_edit)
+
+        browse_button = QtWidgets.QPushButton("Browse...")
+        browse_button.setIcon(QtGui.QIcon.fromTheme("folder"))
+        browse_button.clicked.connect(self._browse_folder)
+        folder_layout.addWidget(browse_button)
+
+        self._tables_check_box = QtWidgets.QCheckBox("Index table values")
+        self._tables_check_box.setChecked(
+            self._settings.value("search/tables", False, type=bool)
+        )
+        folder_layout.addWidget(self._tables_check_box)
+
+        self._update_button = QtWidgets.QPushButton("Update index")
+        self._update_button.setIcon(QtGui.QIcon.fromTheme("view-refresh"))
+        self._update_button.clicked.connect(self._update_index)
+        folder_layout.addWidget(self._update_button)
+
+        search_layout = QtWidgets.QHBoxLayout()
+        layout.addLayout(search_layout)
+
+        self._search_edit = QtWidgets.QLineEdit()
+        self._search_edit.setPlaceholderText(
+            "File name, table value or glob pattern like *.bin"
+        )
+        self._search_edit.setClearButtonEnabled(True)
+        self._search_edit.textChanged.connect(self._search)
+        search_layout.addWidget(self._search_edit)
+
+        self._mode_combo_box = QtWidgets.QComboBox()
+        self._mode_combo_box.addItems(["File names", "Table values"])
+        self._mode_combo_box.currentIndexChanged.connect(self._search)
+        search_layout.addWidget(self._mode_combo_box)
+
+        self._results_table = QtWidgets.QTableWidget()
+        self._results_table.setEditTriggers(
+            QtWidgets.QAbstractItemView.EditTrigger.NoEditTriggers
+        )
+        self._results_table.setSelectionBehavior(
+            QtWidgets.QAbstractItemView.SelectionBehavior.SelectRows
+        )
+        self._results_table.verticalHeader().hide()
+        self._results_table.horizontalHeader().setStretchLastSection(True)
+        self._results_table.cellDoubleClicked.connect(self._open_result)
+        layout.addWidget(self._results_table)
+
+        status_layout = QtWidgets.QHBoxLayout()
+        layout.addLayout(status_layout)
+
+        self._status_label = QtWidgets.QLabel()
+        status_layout.addWidget(self._status_label, 1)
+
+        self._progress_bar = QtWidgets.QProgressBar()
+        self._progress_bar.setMaximumWidth(200)
+        self._progress_bar.setTextVisible(False)
+        self._progress_bar.hide()
+        status_layout.addWidget(self._progress_bar)
+
+        self._show_index_status()
+
+    def closeEvent(self, event: QtGui.QCloseEvent) -> None:
+        self._settings.setValue("search/folder", self._folder_edit.text())
+        self._settings.setValue("search/tables", self._tables_check_box.isChecked())
+        super().closeEvent(event)
+
+    def _show_index_status(self) -> None:
+        paks = self._index.paks()
+        if paks:
+            self._status_label.setText(f"{len(paks)} pak(s) indexed")
+        else:
+            self._status_label.setText(
+                "Nothing indexed yet, select a folder and update the index"
+            )
+
+    def _browse_folder(self) -> None:
+        path = QtWidgets.QFileDialog.getExistingDirectory(
+            self,
+            "Select the folder containing the .pak files",
+            self._folder_edit.text(),
+        )
+        if path:
+            self._folder_edit.setText(path)
+
+    def _update_index(self) -> None:
+        folder = self._folder_edit.text()
+        if not os.path.isdir(folder):
+            QtWidgets.QMessageBox.warning(
+                self, "Error updating index", f"{folder!r} is not a folder"
+            )
+            return
+
+        index_path = self._index_path
+        tables = self._tables_check_box.isChecked()
+
+        def update(task: Task) -> IndexStats:
+            # sqlite connections can't be shared between threads
+            with SearchIndex(index_path) as index:
+                return index.update(
+                    find_paks([folder]), tables=tables, progress=task.report_progress
+                )
+
+        task = Task(update)
+        task.signals.progress.connect(self._update_progress)
+        task.signals.finished.connect(self._index_updated)
+        task.signals.failed.connect(self._index_update_failed)
+        task.signals.cancelled.connect(self._index_update_finished)
+        self._task = task
+
+        self._update_button.setEnabled(False)
+        self._status_label.setText("Updating index...")
+        self._progress_bar.setRange(0, 0)
+        self._progress_bar.show()
+        self._pool.start(task)
+
+    def _update_progress(self, done: int, total: int) -> None:
+        self._progress_bar.setRange(0, total)
+        self._progress_bar.setValue(done)
+
+    def _index_updated(self, stats: IndexStats) -> None:
+        self._index_update_finished()
+        self._status_label.setText(f"Index updated: {stats}")
+        if stats.failed:
+            QtWidgets.QMessageBox.warning(
+                self,
+                "Some paks couldn't be indexed",
+                "\n".join(f"{path}: {error}" for path, error in stats.failed.items()),
+            )
+        self._search()
+
+    def _index_update_failed(self, error: Exception) -> None:
+        self._index_update_finished()
+        self._show_index_status()
+        QtWidgets.QMessageBox.critical(self, "Error updating index", str(error))
+
+    def _index_update_finished(self) -> None:
+        self._task = None
+        self._update_button.setEnabled(True)
+        self._progress_bar.hide()
+
+    def _search(self) -> None:
+        pattern = self._search_edit.text().strip()
+        self._results_table.setRowCount(0)
+        if not pattern:
+            return
+
+        if self._mode_combo_box.currentIndex() == 0:
+            files = self._index.find_files(pattern, limit=MAX_RESULTS)
+            self._show_results(
+                ["Pak", "File", "Size"],
+                [(file.pak, file.name, str(file.length)) for file in files],
+            )
+        else:
+            values = self._index.find_values(pattern, limit=MAX_RESULTS)
+            self._show_results(
+                ["Pak", "File", "Row", "Column", "Value"],
+                [
+                    (
+                        value.pak,
+                        value.file,
+                        str(value.row + 1),
+                        value.column,
+                        value.value,
+                    )
+                    for value in values
+                ],
+            )
+
+    def _show_results(self, headers: list[str], rows: list[tuple[str, ...]]) -> None:
+        self._results_table.setColumnCount(len(headers))
+        self._results_table.setHorizontalHeaderLabels(headers)
+        self._results_table.setRowCount(len(rows))
+
+        for row, values in enumerate(rows):
+            for column, value in enumerate(values):
+                # the full path is in the tooltip, the name is enough to tell paks apart
+                text = os.path.basename(value) if column == 0 else value
+                item = QtWidgets.QTableWidgetItem(text)
+                item.setToolTip(value)
+                self._results_table.setItem(row, column, item)
+
+        self._results_table.resizeColumnsToContents()
+        if len(rows) == MAX_RESULTS:
+            self._status_label.setText(f"Showing the first {MAX_RESULTS} results")
+        else:
+            self._status_label.setText(f"{len(rows)} result(s)")
+
+    def _open_result(self, row: int, column: int) -> None:
+        pak_item = self._results_table.item(row, 0)
+        file_item = self._results_table.item(row, 1)
+        if pak_item is not None and file_item is not None:
+            self.open_file_requested.emit(pak_item.toolTip(), file_item.text())
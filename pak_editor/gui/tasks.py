@@ -0,0 +1,154 @@
+from typing import Any, Callable
+
+from PySide6 import QtCore, QtGui, QtWidgets
+
+
+class TaskCancelled(Exception):
+    pass
+
+
+class TaskSignals(QtCore.QObject):
+    # QRunnable isn't a QObject, so it can't have signals itself
+    # byte counts can exceed 32 bit ints
+    progress = QtCore.Signal(object, object)
+    finished = QtCore.Signal(object)
+    failed = QtCore.Signal(object)
+    cancelled = QtCore.Signal()
+
+
+class Task(QtCore.QRunnable):
+    """Runs `fn` on a thread pool, results are delivered through `signals`.
+
+    `fn` gets the task passed and can call `report_progress` to update the progress
+    indicator, which also raises `TaskCancelled` once the task was cancelled.
+    """
+
+    def __init__(self, fn: Callable[["Task"], Any]) -> None:
+        super().__init__()
+        self.setAutoDelete(False)
+
+        self.signals = TaskSignals()
+        self._fn = fn
+        self._cancelled = False
+
+    @property
+    def is_cancelled(self) -> bool:
+        return self._cancelled
+
+    def cancel(self) -> None:
+        self._cancelled = True
+
+    def report_progress(self, done: int, total: int) -> None:
+        if self._cancelled:
+            raise TaskCancelled()
+        self.signals.progress.emit(done, total)
+
+    def run(self) -> None:
+        try:
+            if self._cancelled:
+                raise TaskCancelled()
+            result = self._fn(self)
+        except TaskCancelled:
+            self.signals.cancelled.emit()
+        except Exception as e:
+            self.signals.failed.emit(e)
+        else:
+            self.signals.finished.emit(result)
+
+
+class TaskManager(QtCore.QObject):
+    """Runs long operations (loading, saving, exporting) off the GUI thread.
+
+    Only one of them runs at a time, its progress is shown in the status bar
+    together with a button to cancel it.
+    """
+
+    running_changed = QtCore.Signal(bool)
+
+    def __init__(self, status_bar: QtWidgets.QStatusBar) -> None:
+        super().__init__()
+        self._pool = QtCore.QThreadPool()
+        self._task: Task | None = None
+        self._on_finished: Callable[[Any], None] | None = None
+        self._on_failed: Callable[[Exception], None] | None = None
+
+        self._label = QtWidgets.QLabel()
+        self._progress_bar = QtWidgets.QProgressBar()
+        self._progress_bar.setMaximumWidth(200)
+        self._progress_bar.setTextVisible(False)
+        self._cancel_button = QtWidgets.QToolButton()
+        self._cancel_button.setIcon(QtGui.QIcon.fromTheme("process-stop"))
+        self._cancel_button.setToolTip("Cancel")
+        self._cancel_button.clicked.connect(self.cancel)
+
+        for widget in (self._label, self._progress_bar, self._cancel_button):
+            status_bar.addPermanentWidget(widget)
+            widget.hide()
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None
+
+    def run(
+        self,
+        description: str,
+        fn: Callable[[Task], Any],
+        on_finished: Callable[[Any], None],
+        on_failed: Callable[[Exception], None],
+    ) -> None:
+        if self._task is not None:
+            raise RuntimeError("another task is still running")
+
+        # signals are connected to methods of the manager (and not to lambdas), so
+        # they are delivered on the GUI thread the manager lives in
+        task = Task(fn)
+        task.signals.progress.connect(self._update_progress)
+        task.signals.finished.connect(self._finished)
+        task.signals.failed.connect(self._failed)
+        task.signals.cancelled.connect(self._cancelled)
+        self._task = task
+        self._on_finished = on_finished
+        self._on_failed = on_failed
+
+        self._label.setText(description)
+        # busy indicator until the first progress report
+        self._progress_bar.setRange(0, 0)
+        for widget in (self._label, self._progress_bar, self._cancel_button):
+            widget.show()
+
+        self.running_changed.emit(True)
+        self._pool.start(task)
+
+    def cancel(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._label.setText("Cancelling...")
+
+    def _update_progress(self, done: int, total: int) -> None:
+        # QProgressBar only takes 32 bit ints, byte counts of big paks don't fit
+        self._progress_bar.setRange(0, 1000)
+        self._progress_bar.setValue(int(done / total * 1000) if total else 1000)
+
+    def _finished(self, result: Any) -> None:
+        callback = self._on_finished
+        self._reset()
+        if callback is not None:
+            callback(result)
+
+    def _failed(self, error: Exception) -> None:
+        callback = self._on_failed
+        self._reset()
+        if callback is not None:
+            callback(error)
+
+    def _cancelled(self) -> None:
+        self._reset()
+
+    def _reset(self) -> None:
+        self._task = None
+        self._on_finished = None
+        self._on_failed = None
+        for widget in (self._label, self._progress_bar, self._cancel_button):
+            widget.hide()
+
+        self.running_changed.emit(False)
@@ -0,0 +1,9 @@
+from PySide6 import QtWidgets
+
+
+def clear_layout(layout: QtWidgets.QLayout) -> None:
+    # See https://stackoverflow.com/a/25330164
+    for i in reversed(range(layout.count())):
+        widget = layout.itemAt(i).widget()
+        layout.removeWidget(widget)
+        widget.setParent(None)
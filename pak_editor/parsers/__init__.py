@@ -0,0 +1,40 @@
+import os
+from typing import Iterator
+
+from .bin_file import iter_bin, parse_bin
+from .dat_file import iter_dat, parse_dat
+from .pak_file import File
+from .table import Table
+
+TABLE_EXTENSIONS = (".bin", ".dat")
+
+
+def parse_table(file: File) -> Table:
+    """Parses a .bin or .dat file from a pak."""
+    _, ext = os.path.splitext(file.name)
+    ext = ext.lower()
+
+    if ext == ".bin":
+        with file.open() as fp:
+            return parse_bin(fp)
+    elif ext == ".dat":
+        with file.open() as fp:
+            return parse_dat(fp)
+    else:
+        raise ValueError(f"{file.name!r} is not a table file")
+
+
+def iter_table_chunks(file: File, chunk_size: int = 4096) -> Iterator[Table]:
+    """Parses a .bin or .dat file from a pak as consecutive tables of up to
+    `chunk_size` rows, the file is read as the chunks are consumed."""
+    _, ext = os.path.splitext(file.name)
+    ext = ext.lower()
+
+    if ext == ".bin":
+        with file.open() as fp:
+            yield from iter_bin(fp, chunk_size).chunks()
+    elif ext == ".dat":
+        with file.open() as fp:
+            yield from iter_dat(fp, chunk_size).chunks()
+    else:
+        raise ValueError(f"{file.name!r} is not a table file")
@@ -1,7 +1,12 @@
 import enum
 import struct
-from dataclasses import dataclass
-from typing import Any, BinaryIO
+from array import array
+from dataclasses import dataclass, field
+from typing import Any, BinaryIO, Iterator, Sequence
+
+from pak_editor import profiling
+
+from .table import BoolColumn, FloatColumn, Table
 
 
 class ColumnType(enum.Enum):
@@ -23,58 +28,252 @@ class ColumnType(enum.Enum):
         else:  # Int, Float, Boolean
             return 4
 
+    @property
+    def struct_format(self) -> str:
+        if self == ColumnType.integer:
+            return "l"
+        elif self == ColumnType.float:
+            return "f"
+        elif self == ColumnType.bool:
+            return "L"
+        else:  # Strings
+            return f"{self.length}s"
+
 
 @dataclass
 class Header:
     name: str
     c_type: ColumnType
+    # the 32 bytes the name was read from, some tables pad names with spaces or have
+    # leftovers after the NUL. Written back unchanged as long as the name is.
+    raw_name: bytes | None = field(default=None, repr=False, compare=False)
+
+    def encode_name(self) -> bytes:
+        raw = self.raw_name
+        if raw is not None and decode_string(raw).strip() == self.name:
+            return raw
+        return self.name.encode("cp949")
 
 
 def decode_string(bytes_: bytes) -> str:
     return bytes_.split(b"\x00")[0].decode("cp949")
 
 
-def parse_bin(fp: BinaryIO) -> list[dict[str, Any]]:
+class BinTable(Table):
+    def __init__(
+        self,
+        headers: list[Header],
+        columns: list[Sequence[Any]],
+        row_ids: array,
+        row_length: int,
+    ) -> None:
+        super().__init__([header.name for header in headers], columns)
+        self.headers = headers
+        self.row_ids = row_ids
+        # Unknown value from the file header, kept as is
+        self.row_length = row_length
+
+
+def read_headers(fp: BinaryIO) -> tuple[int, int, list[Header]]:
+    """Reads the table header, returns the row count, row length and the column headers."""
     row_count: int = struct.unpack("i", fp.read(4))[0]
-    _row_length: int = struct.unpack("i", fp.read(4))[0]
+    row_length: int = struct.unpack("i", fp.read(4))[0]
     column_count: int = struct.unpack("i", fp.read(4))[0]
 
-    headers = [
-        Header(
-            name=decode_string(fp.read(32)).strip(),
-            c_type=ColumnType(struct.unpack("i", fp.read(4))[0]),
+    headers = []
+    for _ in range(column_count):
+        raw_name = fp.read(32)
+        headers.append(
+            Header(
+                name=decode_string(raw_name).strip(),
+                c_type=ColumnType(struct.unpack("i", fp.read(4))[0]),
+                raw_name=raw_name,
+            )
         )
-        for _ in range(column_count)
+
+    return row_count, row_length, headers
+
+
+def row_struct(headers: list[Header]) -> struct.Struct:
+    # Each row starts with an integer with the row id, 0, 1, 2, 3, 4, ...
+    return struct.Struct(
+        "<L" + "".join(header.c_type.struct_format for header in headers)
+    )
+
+
+def decode_column(c_type: ColumnType, values: Sequence[Any]) -> Sequence[Any]:
+    """Converts the raw values of a column, as unpacked by `row_struct`."""
+    if c_type == ColumnType.integer:
+        return array("i", values)
+    elif c_type == ColumnType.float:
+        return FloatColumn(array("f", values))
+    elif c_type == ColumnType.bool:
+        try:
+            return BoolColumn(bytes(values))
+        except ValueError:
+            return BoolColumn(array("I", values))
+    elif c_type in (ColumnType.string_12, ColumnType.string_32, ColumnType.string_128):
+        # most columns only have a handful of distinct values, decode each only once
+        decoded: dict[bytes, str | None] = {}
+        column = []
+        for value in values:
+            string = decoded.get(value, False)
+            if string is False:
+                string = decode_string(value)
+                if string == "#":
+                    string = None
+                decoded[value] = string
+            column.append(string)
+        return column
+    else:
+        raise ValueError(f"unknown column type: {c_type!r}")
+
+
+def _decode_rows(
+    headers: list[Header], row_format: struct.Struct, data: bytes, row_length: int
+) -> BinTable:
+    # All rows are unpacked at once and then converted column by column,
+    # instead of unpacking and checking the type of every single value.
+    if not data:
+        raw_columns: list[Sequence[Any]] = [()] * (len(headers) + 1)
+    else:
+        raw_columns = list(zip(*row_format.iter_unpack(data)))
+
+    # first column is the row id
+    row_ids, *values = raw_columns
+    columns = [
+        decode_column(header.c_type, column) for header, column in zip(headers, values)
     ]
 
-    rows: list[list[Any]] = []
-    for _ in range(row_count):
-        # An integer with the row id, 0, 1, 2, 3, 4, ...
-        _row_id = struct.unpack("<L", fp.read(4))[0]
-
-        row = []
-        for header in headers:
-            value_as_bytes: bytes = fp.read(header.c_type.length)
-
-            if header.c_type == ColumnType.integer:
-                value = struct.unpack("<l", value_as_bytes)[0]
-            elif header.c_type == ColumnType.float:
-                value = round(struct.unpack("<f", value_as_bytes)[0], 6)
-            elif header.c_type == ColumnType.bool:
-                value = bool(struct.unpack("<L", value_as_bytes)[0])
-            elif header.c_type == ColumnType.string_12:
-                value = decode_string(value_as_bytes)
-            elif header.c_type == ColumnType.string_32:
-                value = decode_string(value_as_bytes)
-            elif header.c_type == ColumnType.string_128:
-                value = decode_string(value_as_bytes)
-            else:
-                raise ValueError(f"unknown column type: {header.c_type!r}")
-
-            if value == "#":
-                value = None
-
-            row.append(value)
-        rows.append(row)
-
-    return [{header.name: value for header, value in zip(headers, row)} for row in rows]
+    return BinTable(headers, columns, array("I", row_ids), row_length)
+
+
+def parse_bin(fp: BinaryIO) -> BinTable:
+    with profiling.span("bin.parse") as span:
+        row_count, row_length, headers = read_headers(fp)
+
+        row_format = row_struct(headers)
+        data = fp.read(row_format.size * row_count)
+        if len(data) != row_format.size * row_count:
+            raise ValueError(
+                f"expected {row_count} rows of {row_format.size} bytes, file is too short"
+            )
+
+        span.add(rows=row_count, bytes=len(data))
+        return _decode_rows(headers, row_format, data, row_length)
+
+
+def _encode_column(header: Header, column: Sequence[Any]) -> Sequence[Any]:
+    """Converts a column to the raw values packed by `row_struct`, the inverse of
+    `decode_column`."""
+    c_type = header.c_type
+    if c_type == ColumnType.float and isinstance(column, FloatColumn):
+        # the unrounded float32 values, so they are written back unchanged
+        return column.raw
+    elif c_type == ColumnType.bool and isinstance(column, BoolColumn):
+        return column.raw
+    elif c_type in (ColumnType.integer, ColumnType.float):
+        return column
+    elif c_type == ColumnType.bool:
+        return [int(bool(value)) for value in column]
+
+    # like decoding, each distinct value is only encoded once
+    encoded: dict[str | None, bytes] = {}
+    values = []
+    for value in column:
+        bytes_ = encoded.get(value)
+        if bytes_ is None:
+            bytes_ = b"#" if value is None else value.encode("cp949")
+            if len(bytes_) > c_type.length:
+                raise ValueError(
+                    f"{value!r} in column {header.name!r} is longer than "
+                    f"{c_type.length} bytes"
+                )
+            encoded[value] = bytes_
+        values.append(bytes_)
+    return values
+
+
+def serialize_bin(table: BinTable) -> bytes:
+    """The inverse of `parse_bin`, gives the original bytes for unchanged tables.
+
+    Only the bytes after the NUL of string values are lost: strings are decoded up
+    to the NUL and are padded with zeros again.
+    """
+    with profiling.span("bin.serialize", rows=len(table)):
+        parts = [struct.pack("<iii", len(table), table.row_length, len(table.headers))]
+        parts.extend(
+            struct.pack("<32si", header.encode_name(), header.c_type.value)
+            for header in table.headers
+        )
+
+        columns = [
+            _encode_column(header, column)
+            for header, column in zip(table.headers, table.columns)
+        ]
+        if len(table.row_ids) != len(table):
+            raise ValueError(f"expected {len(table)} row ids, got {len(table.row_ids)}")
+
+        # struct pads the strings with zeros
+        parts.extend(map(row_struct(table.headers).pack, table.row_ids, *columns))
+        return b"".join(parts)
+
+
+def write_bin(fp: BinaryIO, table: BinTable) -> None:
+    fp.write(serialize_bin(table))
+
+
+class BinReader:
+    """Reads a .bin table chunk by chunk, so tables of any size can be processed
+    with bounded memory.
+
+    The headers are available right away, iterating yields the rows as tuples
+    (decoded like the columns of `parse_bin`), `chunks` yields them as tables of up
+    to `chunk_size` rows.
+    """
+
+    def __init__(self, fp: BinaryIO, chunk_size: int = 4096) -> None:
+        if chunk_size < 1:
+            raise ValueError("chunk_size has to be at least 1")
+
+        self.row_count, self.row_length, self.headers = read_headers(fp)
+        self.chunk_size = chunk_size
+        self._fp = fp
+        self._row_format = row_struct(self.headers)
+        self._started = False
+
+    @property
+    def names(self) -> list[str]:
+        return [header.name for header in self.headers]
+
+    def __len__(self) -> int:
+        return self.row_count
+
+    def __iter__(self) -> Iterator[tuple[Any, ...]]:
+        for chunk in self.chunks():
+            yield from chunk.iter_rows()
+
+    def chunks(self) -> Iterator[BinTable]:
+        # the rows are read from the file as they are consumed, only once
+        if self._started:
+            raise RuntimeError("the rows were already read")
+        self._started = True
+
+        remaining = self.row_count
+        while remaining:
+            count = min(remaining, self.chunk_size)
+            size = self._row_format.size * count
+            data = self._fp.read(size)
+            if len(data) != size:
+                raise ValueError(
+                    f"expected {self.row_count} rows of {self._row_format.size} bytes, "
+                    "file is too short"
+                )
+
+            yield _decode_rows(self.headers, self._row_format, data, self.row_length)
+            remaining -= count
+
+
+def iter_bin(fp: BinaryIO, chunk_size: int = 4096) -> BinReader:
+    """Streaming alternative to `parse_bin`, see `BinReader`."""
+    return BinReader(fp, chunk_size)
@@ -1,12 +1,110 @@
-from typing import Any, TextIO
+import codecs
+from itertools import islice
+from typing import Any, BinaryIO, Iterator
 
+from pak_editor import profiling
 
-def parse_dat(fp: TextIO) -> list[dict[str, Any]]:
-    lines = [line.strip() for line in fp.readlines()]
+from .table import Table
 
-    headers = [line.strip() for line in lines[0].split("\t")]
-    data_lines = lines[1:-1]
+# bytes decoded at once
+_READ_SIZE = 1024 * 1024
 
-    rows = [[val.strip() for val in line.strip().split("\t")] for line in data_lines]
 
-    return [{header: value for header, value in zip(headers, row)} for row in rows]
+class DatTable(Table):
+    """Table of a tab separated .dat file, all values are strings."""
+
+
+def _iter_lines(fp: BinaryIO) -> Iterator[str]:
+    # decodes the utf-16 content chunk by chunk, a code unit or line can be split
+    # between two chunks
+    decoder = codecs.getincrementaldecoder("utf-16")()
+    pending = ""
+    while data := fp.read(_READ_SIZE):
+        lines = (pending + decoder.decode(data)).split("\n")
+        pending = lines.pop()
+        yield from lines
+
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+class DatReader:
+    """Reads a .dat table from a binary stream, row by row, so tables of any size can
+    be processed with bounded memory (like `BinReader` for .bin tables).
+
+    The column names are read right away, iterating yields the rows as tuples of
+    stripped strings, `chunks` yields them as tables of up to `chunk_size` rows.
+    Rows that are shorter than the header are missing their last values, which are
+    None. Blank lines, like the one at the end of most files, are skipped.
+
+    The row count isn't known without reading the whole file, `bool()` only reads
+    up to the first row to tell whether there are any.
+    """
+
+    def __init__(self, fp: BinaryIO, chunk_size: int = 4096) -> None:
+        if chunk_size < 1:
+            raise ValueError("chunk_size has to be at least 1")
+
+        self.chunk_size = chunk_size
+        self._lines = _iter_lines(fp)
+        header = next(self._lines, None)
+        self.names = (
+            [] if header is None else [name.strip() for name in header.split("\t")]
+        )
+        self._started = False
+        # the first row, once it was read to check whether there are rows
+        self._first_line: str | None = None
+
+    def __bool__(self) -> bool:
+        if self._first_line is None and not self._started:
+            for line in self._lines:
+                if line and not line.isspace():
+                    self._first_line = line
+                    break
+        return self._first_line is not None
+
+    def _row_lines(self) -> Iterator[str]:
+        if self._first_line is not None:
+            yield self._first_line
+            self._first_line = None
+        yield from self._lines
+
+    def __iter__(self) -> Iterator[tuple[Any, ...]]:
+        # the rows are read from the file as they are consumed, only once
+        if self._started:
+            raise RuntimeError("the rows were already read")
+        self._started = True
+
+        column_count = len(self.names)
+        missing = (None,) * column_count
+        for line in self._row_lines():
+            if not line or line.isspace():
+                continue
+
+            values = tuple(map(str.strip, line.split("\t", column_count)))
+            if len(values) > column_count:
+                values = values[:column_count]
+            yield values + missing[len(values) :]
+
+    def chunks(self) -> Iterator[DatTable]:
+        rows = iter(self)
+        while chunk := list(islice(rows, self.chunk_size)):
+            yield DatTable(self.names, [list(column) for column in zip(*chunk)])
+
+
+def iter_dat(fp: BinaryIO, chunk_size: int = 4096) -> DatReader:
+    """Streaming alternative to `parse_dat`, see `DatReader`."""
+    return DatReader(fp, chunk_size)
+
+
+def parse_dat(fp: BinaryIO) -> DatTable:
+    """Parses a utf-16 encoded .dat table."""
+    with profiling.span("dat.parse") as span:
+        reader = DatReader(fp)
+        rows = list(reader)
+        span.add(rows=len(rows))
+        if not rows:
+            return DatTable(reader.names, [[] for _ in reader.names])
+
+        return DatTable(reader.names, [list(column) for column in zip(*rows)])
@@ -0,0 +1,91 @@
+import struct
+
+DDS_MAGIC = b"DDS "
+DDS_HEADER_SIZE = 128  # magic + 124 byte header
+
+# magic, size, flags, height, width, pitch_or_linear_size, depth, mip_map_count
+_HEADER_STRUCT = struct.Struct("<4s7I")
+# flags, four_cc, rgb_bit_count of the pixel format
+_PIXEL_FORMAT_STRUCT = struct.Struct("<2I4sI")
+_PIXEL_FORMAT_OFFSET = 76
+_CAPS_2_OFFSET = 112
+
+_DDSD_PITCH = 0x8
+_DDSD_MIPMAPCOUNT = 0x20000
+_DDSD_LINEARSIZE = 0x80000
+_DDPF_FOURCC = 0x4
+_DDSCAPS2_CUBEMAP = 0x200
+_DDSCAPS2_VOLUME = 0x200000
+
+# bytes per 4x4 block of the supported compressed formats
+_BLOCK_SIZES = {b"DXT1": 8, b"DXT3": 16, b"DXT5": 16}
+
+
+def _level_size(width: int, height: int, block_size: int | None, bit_count: int) -> int:
+    if block_size is not None:
+        return max(1, (width + 3) // 4) * max(1, (height + 3) // 4) * block_size
+    return width * height * bit_count // 8
+
+
+def extract_mip_level(data: bytes | memoryview, min_size: int) -> bytes | None:
+    """Returns a standalone DDS containing only the smallest mip level of `data`
+    whose width or height is still at least `min_size`.
+
+    Returns None when there is no smaller level, or the texture isn't a plain 2D
+    DXT1/3/5 or uncompressed texture, the full texture has to be decoded then.
+    """
+    if len(data) < DDS_HEADER_SIZE:
+        return None
+
+    magic, _, flags, height, width, _, _, mip_count = _HEADER_STRUCT.unpack_from(data)
+    pf_flags, four_cc, bit_count = _PIXEL_FORMAT_STRUCT.unpack_from(
+        data, _PIXEL_FORMAT_OFFSET
+    )[1:]
+    (caps_2,) = struct.unpack_from("<I", data, _CAPS_2_OFFSET)
+
+    if magic != DDS_MAGIC or not flags & _DDSD_MIPMAPCOUNT or mip_count <= 1:
+        return None
+    if caps_2 & (_DDSCAPS2_CUBEMAP | _DDSCAPS2_VOLUME):
+        return None
+
+    if pf_flags & _DDPF_FOURCC:
+        block_size = _BLOCK_SIZES.get(four_cc)
+        if block_size is None:
+            # DX10 and other extended formats
+            return None
+    elif bit_count in (24, 32):
+        block_size = None
+    else:
+        return None
+
+    offset = DDS_HEADER_SIZE
+    level = 0
+    while (
+        level + 1 < mip_count
+        and max(width, height) // 2 >= min_size
+        and width > 1
+        and height > 1
+    ):
+        offset += _level_size(width, height, block_size, bit_count)
+        width = max(1, width // 2)
+        height = max(1, height // 2)
+        level += 1
+
+    if level == 0:
+        return None
+
+    size = _level_size(width, height, block_size, bit_count)
+    if offset + size > len(data):
+        return None
+
+    if block_size is not None:
+        flags = (flags & ~_DDSD_PITCH) | _DDSD_LINEARSIZE
+        pitch_or_linear_size = size
+    else:
+        flags = (flags & ~_DDSD_LINEARSIZE) | _DDSD_PITCH
+        pitch_or_linear_size = width * bit_count // 8
+
+    header = bytearray(data[:DDS_HEADER_SIZE])
+    struct.pack_into("<4I", header, 8, flags, height, width, pitch_or_linear_size)
+    struct.pack_into("<I", header, 28, 1)
+    return bytes(header) + bytes(data[offset : offset + size])
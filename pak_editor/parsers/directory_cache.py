@@ -0,0 +1,152 @@
+import hashlib
+import os
+import struct
+import sys
+import zlib
+from array import array
+from dataclasses import dataclass
+
+# magic, version, size and modification time of the pak, length of its path
+_ENTRY_STRUCT = struct.Struct("<4sHQqI")
+_MAGIC = b"PDIR"
+_VERSION = 1
+
+_COUNT_STRUCT = struct.Struct("<I")
+_UNKNOWN_SIZE = 24
+
+
+@dataclass
+class Directory:
+    """The file headers of a pak, stored column by column."""
+
+    names: list[str]
+    offsets: array
+    lengths: array
+    checksums: array
+    unknowns: list[bytes]
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def pack(self) -> bytes:
+        numbers = [
+            array("I", column)
+            for column in (self.offsets, self.lengths, self.checksums)
+        ]
+        if sys.byteorder == "big":
+            for column in numbers:
+                column.byteswap()
+
+        return b"".join(
+            [
+                _COUNT_STRUCT.pack(len(self)),
+                *(column.tobytes() for column in numbers),
+                *self.unknowns,
+                "\x00".join(self.names).encode("ascii"),
+            ]
+        )
+
+    @classmethod
+    def unpack(cls, data: bytes) -> "Directory":
+        (count,) = _COUNT_STRUCT.unpack_from(data)
+        pos = _COUNT_STRUCT.size
+
+        numbers = []
+        for _ in range(3):
+            column = array("I")
+            column.frombytes(data[pos : pos + count * column.itemsize])
+            if sys.byteorder == "big":
+                column.byteswap()
+            numbers.append(column)
+            pos += count * column.itemsize
+
+        unknowns = [
+            data[start : start + _UNKNOWN_SIZE]
+            for start in range(pos, pos + count * _UNKNOWN_SIZE, _UNKNOWN_SIZE)
+        ]
+        pos += count * _UNKNOWN_SIZE
+
+        names = data[pos:].decode("ascii").split("\x00") if count else []
+        if len(names) != count or any(len(column) != count for column in numbers):
+            raise ValueError("corrupt directory")
+
+        return cls(names, *numbers, unknowns)
+
+
+def default_cache_directory() -> str:
+    """Per-user cache folder of the platform."""
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    elif sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Caches")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+
+    return os.path.join(base, "florensia-pak-editor", "directories")
+
+
+class DirectoryCache:
+    """Parsed file headers of paks, so reopening a pak that didn't change doesn't
+    have to read and parse them from the (possibly huge) pak again.
+
+    Entries are keyed by the path, size and modification time of the pak and store
+    the headers compressed and without the zero padding of the names, which is
+    about a tenth of their size in the pak. The cache is only an optimization,
+    entries that can't be read or written are ignored.
+    """
+
+    def __init__(self, directory: str | None = None) -> None:
+        self.directory = directory or default_cache_directory()
+
+    def get(self, path: str, size: int, mtime_ns: int) -> Directory | None:
+        path = os.path.abspath(path)
+        try:
+            with open(self._entry_path(path), "rb") as fp:
+                entry = fp.read()
+
+            magic, version, entry_size, entry_mtime_ns, path_length = (
+                _ENTRY_STRUCT.unpack_from(entry)
+            )
+            start = _ENTRY_STRUCT.size + path_length
+            entry_path = entry[_ENTRY_STRUCT.size : start].decode("utf-8")
+
+            if (magic, version, entry_size, entry_mtime_ns, entry_path) != (
+                _MAGIC,
+                _VERSION,
+                size,
+                mtime_ns,
+                path,
+            ):
+                return None
+
+            return Directory.unpack(zlib.decompress(entry[start:]))
+        except (OSError, ValueError, struct.error, zlib.error):
+            return None
+
+    def put(self, path: str, size: int, mtime_ns: int, directory: Directory) -> None:
+        path = os.path.abspath(path)
+        encoded_path = path.encode("utf-8")
+        entry_path = self._entry_path(path)
+        tmp_path = f"{entry_path}.{os.getpid()}.tmp"
+
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(tmp_path, "wb") as fp:
+                fp.write(
+                    _ENTRY_STRUCT.pack(
+                        _MAGIC, _VERSION, size, mtime_ns, len(encoded_path)
+                    )
+                )
+                fp.write(encoded_path)
+                fp.write(zlib.compress(directory.pack(), 1))
+            # readers never see half written entries
+            os.replace(tmp_path, entry_path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def _entry_path(self, path: str) -> str:
+        digest = hashlib.blake2b(path.encode("utf-8"), digest_size=16).hexdigest()
+        return os.path.join(self.directory, f"{digest}.bin")
@@ -1,20 +1,171 @@
+import hashlib
+import io
+import itertools
+import mmap
 import os
 import struct
+from array import array
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
+from typing import BinaryIO, Callable, Iterable, Iterator, cast
 
+from pak_editor import profiling
 
-@dataclass
+from .directory_cache import Directory, DirectoryCache
+
+# each file takes up 260 + 4 + 4 + 24 + 4 bytes of header data
+FILE_HEADER_SIZE = 260 + 4 + 4 + 24 + 4
+
+_COUNT_STRUCT = struct.Struct("<I")
+# name, offset, length, unknown and checksum_1 of a file
+# unknown appears to be the same for some files, the first 4 bytes are always
+# 2172649504 and the others change when the int values in the version.bin file change.
+# checksum_1 matches the first value in version.bin, it's probably used by the
+# launcher to check if a file has changed.
+_FILE_HEADER_STRUCT = struct.Struct("<260sII24sI")
+_EMPTY_UNKNOWN = bytes(24)
+
+# chunk size used when content has to be copied through python
+_COPY_CHUNK_SIZE = 1024 * 1024
+
+# amount of file headers that are read between progress reports
+_PROGRESS_INTERVAL = 1024
+
+# Called with the amount of work done and the total amount of work. It may raise
+# to abort the operation.
+ProgressCallback = Callable[[int, int], None]
+
+_source_ids = itertools.count()
+
+
+class PakSource:
+    """Read-only memory mapping of a .pak file on disk.
+
+    Lazily loaded entries only keep their offset and length and read their content
+    from the shared mapping, so opening an archive doesn't pull it into memory.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        # unlike id(), never reused for another source
+        self.id = next(_source_ids)
+        self._open()
+
+    def _open(self) -> None:
+        self._fp = open(self.path, "rb")
+
+        try:
+            stat = os.fstat(self._fp.fileno())
+            size = stat.st_size
+            self.mtime_ns = stat.st_mtime_ns
+            # mmap can't map empty files
+            self._mmap = (
+                mmap.mmap(self._fp.fileno(), 0, access=mmap.ACCESS_READ)
+                if size
+                else None
+            )
+        except Exception:
+            self._fp.close()
+            raise
+
+    @property
+    def size(self) -> int:
+        return len(self._mmap) if self._mmap is not None else 0
+
+    def view(self, offset: int, length: int) -> memoryview:
+        """Zero-copy view into the mapping. Release it (or use it as a context
+        manager) when done, the mapping can't be closed while views are alive."""
+        if offset < 0 or offset + length > self.size:
+            raise ValueError(
+                f"range {offset}:{offset + length} is outside of the pak file ({self.size} bytes)"
+            )
+
+        if self._mmap is None:
+            return memoryview(b"")
+
+        with memoryview(self._mmap) as view:
+            return view[offset : offset + length]
+
+    def read(self, offset: int, length: int) -> bytes:
+        with self.view(offset, length) as view:
+            return view.tobytes()
+
+    def fileno(self) -> int:
+        return self._fp.fileno()
+
+    def close(self) -> None:
+        if self._mmap is not None:
+            self._mmap.close()
+        self._fp.close()
+
+    def reopen(self) -> None:
+        """Maps the file again after it was closed, its content mustn't have changed."""
+        self._open()
+
+
+class _ViewReader(io.RawIOBase):
+    """Raw stream over a memoryview, which is released when the stream is closed."""
+
+    def __init__(self, view: memoryview) -> None:
+        super().__init__()
+        self._view = view
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:  # type: ignore[override]
+        with memoryview(buffer) as target:
+            count = max(0, min(len(target), len(self._view) - self._pos))
+            target[:count] = self._view[self._pos : self._pos + count]
+        self._pos += count
+        return count
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += len(self._view)
+        if offset < 0:
+            raise ValueError(f"negative seek position {offset}")
+
+        self._pos = offset
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+    def close(self) -> None:
+        if not self.closed:
+            self._view.release()
+        super().close()
+
+
+@dataclass(eq=False)
 class File:
     name: str
-    content: bytes = field(repr=False)
 
-    # These values that are available when a pak is read, but not when a file is manually created/added.
-    # They are not used anywhere and are only informative.
+    # Content of files that were created/added manually. Files that were lazily
+    # loaded from a pak keep this empty and read their content from `source` instead.
+    data: bytes | None = field(repr=False, default=None)
+
+    # These values are available when a pak is read, but not when a file is manually created/added.
+    # Lazily loaded files read their content from `source` at `offset`/`length`, and
+    # `checksum_1`/`unknown` are written back unchanged for untouched files (see
+    # `_header_values`), so they must be kept as read.
     offset: int | None = field(compare=False, hash=False, default=None)
     length: int | None = field(compare=False, hash=False, default=None)
     checksum_1: int | None = field(compare=False, hash=False, default=None)
     unknown: bytes | None = field(compare=False, hash=False, default=None)
 
+    source: PakSource | None = field(repr=False, compare=False, default=None)
+
+    # set once the content of a file that was read from a pak gets replaced
+    modified: bool = field(repr=False, compare=False, default=False)
+
     @classmethod
     def from_path(cls, path: str):
         filename = os.path.basename(path)
@@ -22,74 +173,610 @@ class File:
         with open(path, "rb") as fp:
             content = fp.read()
 
-        return cls(name=filename, content=content)
+        return cls(name=filename, data=content)
+
+    @property
+    def content(self) -> bytes:
+        """Content of the file, read from the pak on demand for lazily loaded files."""
+        if self.data is not None:
+            return self.data
+
+        assert self.source is not None and self.offset is not None
+        return self.source.read(self.offset, self.size)
+
+    @content.setter
+    def content(self, value: bytes) -> None:
+        self.data = value
+        self.modified = True
+
+    @property
+    def size(self) -> int:
+        if self.data is not None:
+            return len(self.data)
+
+        assert self.length is not None
+        return self.length
+
+    def view(self) -> memoryview:
+        """Zero-copy view of the content, see `PakSource.view`."""
+        if self.data is not None:
+            return memoryview(self.data)
+
+        assert self.source is not None and self.offset is not None
+        return self.source.view(self.offset, self.size)
+
+    def open(self) -> BinaryIO:
+        """Readable file object over the content that doesn't copy it into memory
+        first. Close it when done, see `view`."""
+        return io.BufferedReader(_ViewReader(self.view()))
+
+    def digest(self) -> bytes:
+        """BLAKE2b hash of the content, computed without copying it."""
+        with self.view() as view:
+            return hashlib.blake2b(view).digest()
+
+    def write_to(self, fp: BinaryIO) -> None:
+        """Writes the content to `fp`, content that is still inside a memory mapped pak
+        is copied by the kernel where the platform supports it."""
+        copied = 0
+        if self.data is None and self.source is not None and self.size:
+            assert self.offset is not None
+            copied = _copy_file_range(self.source, self.offset, self.size, fp)
+
+        if copied == self.size:
+            return
+
+        with self.view() as view:
+            for start in range(copied, len(view), _COPY_CHUNK_SIZE):
+                fp.write(view[start : start + _COPY_CHUNK_SIZE])
+
+    def _header_values(self) -> tuple[int, bytes]:
+        # checksum_1 and unknown are only kept for untouched files, we don't know
+        # how they are calculated
+        if self.modified or self.checksum_1 is None or self.unknown is None:
+            return 0, _EMPTY_UNKNOWN
+        return self.checksum_1, self.unknown
 
 
-@dataclass
 class PakFile:
-    files: list[File]
+    """Files of a pak, in their order inside the pak.
+
+    Files are indexed by their name. Change them through `replace`/`remove_many`,
+    `files` is a read-only snapshot.
+
+    Names are unique in paks written by the game's tools, but some paks contain
+    later files with the name of an earlier one. Those are kept in `duplicates`
+    and written back at their position, lookups by name only find the first one.
+    """
+
+    def __init__(
+        self,
+        files: Iterable[File] = (),
+        original_file_name: str | None = None,
+        source: PakSource | None = None,
+    ) -> None:
+        self.files = files
+
+        # Same as File attributes above, only informative (used for window title though)
+        self.original_file_name = original_file_name
+
+        self.source = source
+
+    def __repr__(self) -> str:
+        return f"PakFile(original_file_name={self.original_file_name!r}, files={len(self)})"
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    def __iter__(self) -> Iterator[File]:
+        return iter(self._files.values())
+
+    def __contains__(self, name: object) -> bool:
+        return isinstance(name, str) and name in self._files
+
+    @property
+    def files(self) -> tuple[File, ...]:
+        return tuple(self._files.values())
+
+    @files.setter
+    def files(self, files: Iterable[File]) -> None:
+        # duplicates are stored under (name, position) keys, which keeps them in order
+        # without getting in the way of lookups by name
+        self._files: dict[str | tuple[str, int], File] = {}
+        self._duplicate_keys: dict[str, list[tuple[str, int]]] = {}
+        for position, file in enumerate(files):
+            if self._files.setdefault(file.name, file) is not file:
+                key = (file.name, position)
+                self._files[key] = file
+                self._duplicate_keys.setdefault(file.name, []).append(key)
+
+    @property
+    def duplicates(self) -> list[File]:
+        """Files with the name of an earlier file, in their order inside the pak."""
+        return [file for key, file in self._files.items() if isinstance(key, tuple)]
+
+    def get(self, name: str) -> File | None:
+        return self._files.get(name)
+
+    def replace(self, file: File) -> File | None:
+        """Adds `file`, a file with the same name is replaced (keeping its position).
+        Returns the replaced file."""
+        previous = self._files.get(file.name)
+        self._files[file.name] = file
+        return previous
+
+    def replace_many(self, files: Iterable[File]) -> list[File]:
+        """Same as `replace` for multiple files, returns the replaced files."""
+        replaced = []
+        for file in files:
+            previous = self.replace(file)
+            if previous is not None:
+                replaced.append(previous)
+        return replaced
 
-    # Same as File attributes above, only informative (used for window title though)
-    original_file_name: str | None = field(compare=False, hash=False, default=None)
+    def remove_many(self, names: Iterable[str]) -> list[File]:
+        """Removes the files with the given names (including their duplicates),
+        returns the removed files. Names that aren't part of the pak are ignored."""
+        removed = []
+        for name in names:
+            file = self._files.pop(name, None)
+            if file is not None:
+                removed.append(file)
+            for key in self._duplicate_keys.pop(name, ()):
+                removed.append(self._files.pop(key))
+        return removed
 
     @classmethod
-    def load(cls, path: str):
-        with open(path, "rb") as fp:
-            count = struct.unpack("<I", fp.read(4))[0]
+    def load(
+        cls,
+        path: str,
+        lazy: bool = True,
+        progress: ProgressCallback | None = None,
+        cache: DirectoryCache | None = None,
+    ):
+        """Reads the .pak file at `path`.
 
-            files: list[File] = []
-            for _ in range(count):
-                name_as_bytes: bytes = struct.unpack("<260s", fp.read(260))[0]
-                name = name_as_bytes.decode("ascii").rstrip("\x00")
+        With `lazy`, the file is memory mapped and the content of each entry is only
+        read once it is accessed. Otherwise all entries are read into memory.
+        `progress` is called with the amount of file headers read. With a `cache`,
+        the file headers of a pak that didn't change since it was last loaded are
+        read from the cache instead of the pak.
+        """
+        with profiling.span("pak.load") as span:
+            source = PakSource(path)
+
+            try:
+                files = cls._read_files(source, lazy, progress, cache)
+            except Exception:
+                source.close()
+                raise
+
+            span.add(files=len(files), bytes=source.size)
+            if not lazy:
+                source.close()
+
+        filename = os.path.basename(path)
+        return cls(
+            files=files,
+            original_file_name=filename,
+            source=source if lazy else None,
+        )
+
+    @staticmethod
+    def _read_files(
+        source: PakSource,
+        lazy: bool,
+        progress: ProgressCallback | None,
+        cache: DirectoryCache | None = None,
+    ) -> list[File]:
+        with source.view(0, source.size) as view:
+            if len(view) < _COUNT_STRUCT.size:
+                raise ValueError("file is too small to be a pak file")
+
+            count = _COUNT_STRUCT.unpack_from(view)[0]
+            end = _COUNT_STRUCT.size + count * FILE_HEADER_SIZE
 
-                offset = struct.unpack("<I", fp.read(4))[0]
-                length = struct.unpack("<I", fp.read(4))[0]
+            if end > len(view):
+                raise ValueError(f"file is too small to contain {count} file headers")
 
-                # appears to be the same for some files
-                # first 4 bytes are always 2172649504
-                # bytes are different when the int values in the version.bin file changes
-                unknown = fp.read(24)  # noqa: F841
+            directory = None
+            if cache is not None:
+                with profiling.span("pak.directory_cache.get"):
+                    directory = cache.get(source.path, source.size, source.mtime_ns)
+                if directory is not None and len(directory) != count:
+                    directory = None
 
-                # matches first value in version.bin
-                # probably used by the launcher to check if a file has changed
-                checksum_1 = struct.unpack("<I", fp.read(4))[0]  # noqa: F841
+            if directory is None:
+                with (
+                    profiling.span("pak.parse_directory", headers=count),
+                    view[_COUNT_STRUCT.size : end] as headers,
+                ):
+                    directory = _parse_directory(headers)
+                if cache is not None:
+                    with profiling.span("pak.directory_cache.put"):
+                        cache.put(source.path, source.size, source.mtime_ns, directory)
 
-                previous_pos = fp.tell()
-                fp.seek(offset)
-                content = fp.read(length)
-                fp.seek(previous_pos)
+            headers = zip(
+                directory.names,
+                directory.offsets,
+                directory.lengths,
+                directory.checksums,
+                directory.unknowns,
+            )
 
-                files.append(
+            files: list[File] = []
+            for start in range(0, count, _PROGRESS_INTERVAL):
+                if progress is not None:
+                    progress(start, count)
+
+                # positional arguments, keywords are noticeably slower for big paks
+                files.extend(
                     File(
-                        name=name,
-                        content=content,
-                        offset=offset,
-                        length=length,
-                        checksum_1=checksum_1,
-                        unknown=unknown,
+                        name,
+                        None if lazy else view[offset : offset + length].tobytes(),
+                        offset,
+                        length,
+                        checksum_1,
+                        unknown,
+                        source if lazy else None,
+                    )
+                    for name, offset, length, checksum_1, unknown in itertools.islice(
+                        headers, _PROGRESS_INTERVAL
                     )
                 )
 
-        filename = os.path.basename(path)
-        return cls(files=files, original_file_name=filename)
+        return files
 
-    def pack(self) -> bytes:
-        out = b""
-        out += struct.pack("<I", len(self.files))
+    def close(self) -> None:
+        """Closes the memory mapping of a lazily loaded pak. Content of its
+        unmodified files can't be accessed anymore afterwards."""
+        if self.source is not None:
+            self.source.close()
+            self.source = None
 
+    def _offsets(self, dedup: bool = False, workers: int | None = None) -> list[int]:
         # our first offset starts after the file headers
-        # each file takes up 260 + 4 + 4 + 24 + 4 bytes of header data
-        offset = 4 + ((260 + 4 + 4 + 24 + 4) * len(self.files))
+        offset = _COUNT_STRUCT.size + FILE_HEADER_SIZE * len(self)
+
+        files = list(self)
+        duplicates = {}
+        if dedup:
+            with profiling.span("pak.find_duplicates") as span:
+                duplicates = _find_duplicates(files, workers)
+                span.add(duplicates=len(duplicates))
+
+        offsets = []
+        for idx, file in enumerate(files):
+            original = duplicates.get(idx)
+            if original is not None:
+                offsets.append(offsets[original])
+                continue
+
+            offsets.append(offset)
+            offset += file.size
+
+        return offsets
+
+    def write_to(
+        self,
+        fp: BinaryIO,
+        progress: ProgressCallback | None = None,
+        dedup: bool = False,
+        workers: int | None = None,
+    ) -> None:
+        """Writes the pak to `fp` in a single pass.
+
+        The header table is packed into one buffer, content is streamed afterwards
+        without building the archive in memory. Unmodified content of a lazily loaded
+        pak is copied by the kernel where the platform supports it.
+        `progress` is called with the amount of content bytes written.
+
+        With `dedup`, files with identical content are stored only once and share
+        their offset. Only files with the same size as another file are hashed, by a
+        pool of `workers` threads.
+        """
+        with profiling.span("pak.write", files=len(self)):
+            self._write(fp, self._offsets(dedup, workers), progress)
+
+    def _write(
+        self,
+        fp: BinaryIO,
+        offsets: list[int],
+        progress: ProgressCallback | None,
+    ) -> None:
+        with profiling.span("pak.write_headers", files=len(self)):
+            fp.write(self._pack_headers(offsets))
+
+        position = _COUNT_STRUCT.size + FILE_HEADER_SIZE * len(self)
+        end = max(
+            (offset + file.size for file, offset in zip(self, offsets)),
+            default=position,
+        )
+        total = end - position
+        done = 0
+        with profiling.span("pak.write_content", bytes=total):
+            for file, offset in zip(self, offsets):
+                # duplicates point to content that was written already
+                if offset < position:
+                    continue
+
+                file.write_to(fp)
+                position += file.size
+
+                done += file.size
+                if progress is not None:
+                    progress(done, total)
+
+    def _pack_headers(self, offsets: list[int]) -> bytearray:
+        header = bytearray(_COUNT_STRUCT.size + FILE_HEADER_SIZE * len(self))
+        _COUNT_STRUCT.pack_into(header, 0, len(self))
+
+        for idx, (file, offset) in enumerate(zip(self, offsets)):
+            checksum_1, unknown = file._header_values()
+            _FILE_HEADER_STRUCT.pack_into(
+                header,
+                _COUNT_STRUCT.size + FILE_HEADER_SIZE * idx,
+                file.name.encode("ascii"),
+                offset,
+                file.size,
+                unknown,
+                checksum_1,
+            )
+
+        return header
+
+    def save_to(
+        self,
+        path: str,
+        progress: ProgressCallback | None = None,
+        dedup: bool = False,
+        workers: int | None = None,
+        rebind: bool = False,
+    ) -> None:
+        """Writes the pak to `path`, see `write_to` for `dedup`.
+
+        The pak is written to a temporary file next to `path` first, so an existing
+        file is only replaced once writing succeeded. This also allows saving a lazily
+        loaded pak over its own source, all files are read from the new file afterwards.
+        With `rebind`, that's the case for any `path`, like after "Save as" in an
+        editor: the pak continues with the new file, its previous source is closed.
+        """
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        source = self.source
+        overwrites_source = False
+
+        try:
+            with profiling.span("pak.save", files=len(self)):
+                offsets = self._offsets(dedup, workers)
+                with open(tmp_path, "wb") as fp:
+                    self._write(fp, offsets, progress)
+
+            overwrites_source = (
+                source is not None
+                and os.path.exists(path)
+                and os.path.samefile(path, source.path)
+            )
+
+            # the mapping has to be closed before its file can be replaced (on Windows)
+            if overwrites_source:
+                self.close()
 
-        for file in self.files:
-            out += struct.pack("<260s", file.name.encode("ascii"))
-            out += struct.pack("<I", offset)
-            out += struct.pack("<I", len(file.content))
-            out += struct.pack("28x")
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            # e.g. another process has the pak open on Windows, it wasn't replaced so
+            # the files can keep reading from it
+            if overwrites_source and self.source is None and source is not None:
+                source.reopen()
+                self.source = source
+            raise
 
-            offset += len(file.content)
+        if overwrites_source:
+            self._rebind(PakSource(path), offsets)
+        elif rebind:
+            previous = self.source
+            self._rebind(PakSource(path), offsets)
+            self.original_file_name = os.path.basename(path)
+            if previous is not None:
+                previous.close()
+
+    def save_incremental(
+        self,
+        path: str,
+        compact_threshold: float = 0.25,
+        progress: ProgressCallback | None = None,
+    ) -> bool:
+        """Saves the changes of a lazily loaded pak into its own file at `path`.
+
+        Only the header table is rewritten. Content of added and modified files is
+        appended to the end of the file, untouched files stay where they are. Space of
+        removed or replaced content is left unused until it makes up more than
+        `compact_threshold` of the file, the whole pak is rewritten using `save_to` then
+        (same for paks that weren't lazily loaded from `path`).
+
+        Returns whether the pak could be saved incrementally.
+        """
+        source = self.source
+        if (
+            source is None
+            or not os.path.exists(path)
+            or not os.path.samefile(path, source.path)
+        ):
+            self.save_to(path, progress)
+            return False
+
+        header_size = _COUNT_STRUCT.size + FILE_HEADER_SIZE * len(self)
+
+        # files that are stored in this pak already and don't have to be written again.
+        # A growing header table overwrites the content of the first files, so those
+        # are relocated as well.
+        kept = [
+            file.source is source
+            and not file.modified
+            and file.data is None
+            and cast(int, file.offset) >= header_size
+            for file in self
+        ]
+
+        offsets: list[int] = []
+        end = source.size
+        for file, is_kept in zip(self, kept):
+            if is_kept:
+                offsets.append(cast(int, file.offset))
+            else:
+                offsets.append(end)
+                end += file.size
+
+        # files can share the same content (same offset and length)
+        used_ranges = {(offset, file.size) for file, offset in zip(self, offsets)}
+        wasted = end - header_size - sum(length for _, length in used_ranges)
+        if end and wasted / end > compact_threshold:
+            self.save_to(path, progress)
+            return False
+
+        with (
+            profiling.span("pak.save_incremental", bytes=end - source.size),
+            open(path, "r+b") as fp,
+        ):
+            # content is appended first, so the old header table stays valid
+            # until all of the new content is written
+            fp.seek(source.size)
+            done = 0
+            for file, is_kept in zip(self, kept):
+                if not is_kept:
+                    file.write_to(fp)
+
+                    done += file.size
+                    if progress is not None:
+                        progress(done, end - source.size)
+            fp.flush()
+            os.fsync(fp.fileno())
+
+            fp.seek(0)
+            fp.write(self._pack_headers(offsets))
+
+        # the mapping doesn't cover the appended content
+        self.close()
+        self._rebind(PakSource(path), offsets)
+        return True
+
+    def _rebind(self, source: PakSource, offsets: list[int]) -> None:
+        # points all files to their content inside a freshly written pak
+        for file, offset in zip(self, offsets):
+            file.checksum_1, file.unknown = file._header_values()
+            file.length = file.size
+            file.offset = offset
+            file.data = None
+            file.source = source
+            file.modified = False
+
+        self.source = source
+
+    def pack(self, dedup: bool = False, workers: int | None = None) -> bytes:
+        out = io.BytesIO()
+        self.write_to(out, dedup=dedup, workers=workers)
+        return out.getvalue()
+
+
+def _find_duplicates(files: list[File], workers: int | None) -> dict[int, int]:
+    """Maps the position of every file whose content matches an earlier file to the
+    position of that earlier file."""
+    by_size: dict[int, list[int]] = {}
+    for idx, file in enumerate(files):
+        if file.size:
+            by_size.setdefault(file.size, []).append(idx)
+
+    # only files that share their size with another file can be duplicates
+    candidates = sorted(
+        idx for group in by_size.values() if len(group) > 1 for idx in group
+    )
+
+    # files of a pak that was deduplicated before share their content already, which
+    # only has to be hashed once
+    regions: dict[tuple[int, int | None, int], int] = {}
+    hashed_as: dict[int, int] = {}
+    for idx in candidates:
+        file = files[idx]
+        if file.data is None and file.source is not None:
+            region = (id(file.source), file.offset, file.size)
+            hashed_as[idx] = regions.setdefault(region, idx)
+        else:
+            hashed_as[idx] = idx
+
+    hashed = sorted(set(hashed_as.values()))
+    # hashing releases the GIL, so the threads run in parallel
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        digests = dict(
+            zip(hashed, executor.map(lambda idx: files[idx].digest(), hashed))
+        )
+
+    duplicates: dict[int, int] = {}
+    originals: dict[bytes, int] = {}
+    for idx in candidates:
+        original = originals.setdefault(digests[hashed_as[idx]], idx)
+        if original != idx:
+            duplicates[idx] = original
+
+    return duplicates
+
+
+def _parse_directory(headers: memoryview) -> Directory:
+    if not headers:
+        return Directory([], array("I"), array("I"), array("I"), [])
+
+    names, offsets, lengths, unknowns, checksums = zip(
+        *_FILE_HEADER_STRUCT.iter_unpack(headers)
+    )
+    return Directory(
+        names=[name.rstrip(b"\x00").decode("ascii") for name in names],
+        offsets=array("I", offsets),
+        lengths=array("I", lengths),
+        checksums=array("I", checksums),
+        unknowns=list(unknowns),
+    )
+
+
+def _copy_file_range(source: PakSource, offset: int, length: int, fp: BinaryIO) -> int:
+    """Copies a range of `source` to the current position of `fp` without going
+    through python, returns the amount of bytes copied (0 if not supported)."""
+    copy_file_range = getattr(os, "copy_file_range", None)
+    sendfile = getattr(os, "sendfile", None)
+    if copy_file_range is None and sendfile is None:
+        return 0
+
+    try:
+        out_fd = fp.fileno()
+    except (AttributeError, io.UnsupportedOperation):
+        return 0
+
+    fp.flush()
+    position = fp.tell()
+
+    copied = 0
+    try:
+        while copied < length:
+            if copy_file_range is not None:
+                count = copy_file_range(
+                    source.fileno(),
+                    out_fd,
+                    length - copied,
+                    offset + copied,
+                    position + copied,
+                )
+            else:
+                assert sendfile is not None
+                os.lseek(out_fd, position + copied, os.SEEK_SET)
+                count = sendfile(
+                    out_fd, source.fileno(), offset + copied, length - copied
+                )
 
-        for file in self.files:
-            out += file.content
+            if count == 0:
+                break
+            copied += count
+    except OSError:
+        # e.g. not supported by the file system, the rest is written the normal way
+        pass
 
-        return out
+    fp.seek(position + copied)
+    return copied
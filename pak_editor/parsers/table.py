@@ -0,0 +1,114 @@
+from array import array
+from typing import Any, Iterator, Sequence, overload
+
+
+class FloatColumn(Sequence[float]):
+    """float32 values, rounded to 6 decimals when accessed (same as parse_bin always did)."""
+
+    def __init__(self, values: array) -> None:
+        self._values = values
+
+    @property
+    def raw(self) -> array:
+        return self._values
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    @overload
+    def __getitem__(self, idx: int) -> float: ...
+
+    @overload
+    def __getitem__(self, idx: slice) -> list[float]: ...
+
+    def __getitem__(self, idx: int | slice) -> float | list[float]:
+        if isinstance(idx, slice):
+            return [round(value, 6) for value in self._values[idx]]
+        return round(self._values[idx], 6)
+
+    def __iter__(self) -> Iterator[float]:
+        for value in self._values:
+            yield round(value, 6)
+
+
+class BoolColumn(Sequence[bool]):
+    """Booleans stored as one byte each, or as integers for values above 255.
+
+    The stored values aren't limited to 0 and 1, so writing a table back keeps them.
+    """
+
+    def __init__(self, values: bytes | array) -> None:
+        self._values = values
+
+    @property
+    def raw(self) -> bytes | array:
+        return self._values
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    @overload
+    def __getitem__(self, idx: int) -> bool: ...
+
+    @overload
+    def __getitem__(self, idx: slice) -> list[bool]: ...
+
+    def __getitem__(self, idx: int | slice) -> bool | list[bool]:
+        if isinstance(idx, slice):
+            return [bool(value) for value in self._values[idx]]
+        return bool(self._values[idx])
+
+    def __iter__(self) -> Iterator[bool]:
+        for value in self._values:
+            yield bool(value)
+
+
+class Table:
+    """Table data stored column by column.
+
+    Numeric columns are kept in typed arrays and string columns share their
+    (decoded once) values, which takes a fraction of the memory of one dict per row.
+    Iterating over a table yields the rows as dicts.
+    """
+
+    def __init__(self, names: list[str], columns: list[Sequence[Any]]) -> None:
+        if len(names) != len(columns):
+            raise ValueError(f"expected {len(names)} columns, got {len(columns)}")
+
+        lengths = {len(column) for column in columns}
+        if len(lengths) > 1:
+            raise ValueError("all columns need to have the same length")
+
+        self.names = names
+        self.columns = columns
+        self._row_count = lengths.pop() if lengths else 0
+
+    def __len__(self) -> int:
+        return self._row_count
+
+    def __getitem__(self, idx: int) -> dict[str, Any]:
+        return dict(zip(self.names, self.row(idx)))
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        for row in self.iter_rows():
+            yield dict(zip(self.names, row))
+
+    def row(self, idx: int) -> tuple[Any, ...]:
+        if idx < 0:
+            idx += self._row_count
+        if not 0 <= idx < self._row_count:
+            raise IndexError("row index out of range")
+
+        return tuple(column[idx] for column in self.columns)
+
+    def iter_rows(self) -> Iterator[tuple[Any, ...]]:
+        return zip(*self.columns)
+
+    def column(self, name: str) -> Sequence[Any]:
+        try:
+            return self.columns[self.names.index(name)]
+        except ValueError:
+            raise KeyError(name) from None
+
+    def cell(self, row: int, column: int) -> Any:
+        return self.columns[column][row]
@@ -0,0 +1,198 @@
+"""Opt-in timing of the slow parts: loading, parsing, previewing and saving.
+
+Code that might be slow runs inside named spans, which can count rows, bytes, etc.:
+
+    with profiling.span("bin.parse") as span:
+        table = ...
+        span.add(rows=len(table))
+
+Spans are only recorded once profiling is enabled, using `enable` or by setting the
+PAK_EDITOR_PROFILE environment variable to the path of a Chrome trace file (open it
+in chrome://tracing or https://ui.perfetto.dev) or to 1. Otherwise `span` returns a
+shared object that does nothing, which costs about as much as a function call.
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+ENV_VARIABLE = "PAK_EDITOR_PROFILE"
+
+
+@dataclass
+class Span:
+    name: str
+    counters: dict[str, int] = field(default_factory=dict)
+    # time.perf_counter_ns() values
+    start: int = 0
+    end: int = 0
+    thread: int = 0
+    # spans that ran inside this one, on the same thread
+    children: list["Span"] = field(default_factory=list, repr=False)
+
+    @property
+    def duration(self) -> float:
+        """Seconds."""
+        return (self.end - self.start) / 1e9
+
+    def add(self, **counters: int) -> None:
+        for name, value in counters.items():
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def summary(self) -> str:
+        """Duration of this span and its direct children, on one line."""
+        text = f"{self.name} {_format_duration(self.duration)}"
+        if self.counters:
+            counters = ", ".join(
+                f"{name}={value:,}" for name, value in self.counters.items()
+            )
+            text += f" ({counters})"
+
+        totals: dict[str, float] = {}
+        for child in self.children:
+            totals[child.name] = totals.get(child.name, 0.0) + child.duration
+        if totals:
+            text += ": " + ", ".join(
+                f"{name} {_format_duration(duration)}"
+                for name, duration in totals.items()
+            )
+        return text
+
+    def __enter__(self) -> "Span":
+        stack = _stack()
+        if stack:
+            stack[-1].children.append(self)
+        stack.append(self)
+
+        self.thread = threading.get_ident()
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.end = time.perf_counter_ns()
+
+        stack = _stack()
+        stack.pop()
+        if not stack:
+            _finished(self)
+
+
+class _DisabledSpan:
+    def add(self, **counters: int) -> None:
+        pass
+
+    def __enter__(self) -> "_DisabledSpan":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        pass
+
+
+_DISABLED_SPAN = _DisabledSpan()
+
+_enabled = False
+_lock = threading.Lock()
+_local = threading.local()
+# spans that didn't run inside another span, in the order they finished
+_spans: list[Span] = []
+_listeners: list[Callable[[Span], None]] = []
+_trace_paths: set[str] = set()
+
+
+def span(name: str, **counters: int) -> Span | _DisabledSpan:
+    if not _enabled:
+        return _DISABLED_SPAN
+    return Span(name, dict(counters))
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def enable(trace_path: str | None = None) -> None:
+    """Starts recording spans. With `trace_path`, all spans are written to it as a
+    Chrome trace when the program exits."""
+    global _enabled
+    _enabled = True
+
+    if trace_path is not None and trace_path not in _trace_paths:
+        _trace_paths.add(trace_path)
+        atexit.register(write_trace, trace_path)
+
+
+def enable_from_environment() -> None:
+    value = os.environ.get(ENV_VARIABLE, "")
+    if value and value != "0":
+        enable(None if value == "1" else value)
+
+
+def spans() -> list[Span]:
+    """All spans that didn't run inside another one, in the order they finished."""
+    with _lock:
+        return list(_spans)
+
+
+def add_listener(listener: Callable[[Span], None]) -> None:
+    """Calls `listener` with every span that didn't run inside another one, once it
+    finished. The listener is called on the thread that ran the span."""
+    with _lock:
+        _listeners.append(listener)
+
+
+def remove_listener(listener: Callable[[Span], None]) -> None:
+    with _lock:
+        _listeners.remove(listener)
+
+
+def write_trace(path: str) -> None:
+    """Writes all recorded spans in the Chrome trace event format."""
+    events: list[dict[str, Any]] = []
+    pid = os.getpid()
+
+    def add_events(span: Span) -> None:
+        events.append(
+            {
+                "name": span.name,
+                "ph": "X",
+                "ts": span.start / 1000,
+                "dur": (span.end - span.start) / 1000,
+                "pid": pid,
+                "tid": span.thread,
+                "args": span.counters,
+            }
+        )
+        for child in span.children:
+            add_events(child)
+
+    for root in spans():
+        add_events(root)
+
+    with open(path, "w", encoding="utf-8") as fp:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, fp)
+
+
+def _stack() -> list[Span]:
+    try:
+        return _local.stack
+    except AttributeError:
+        _local.stack = []
+        return _local.stack
+
+
+def _finished(span: Span) -> None:
+    with _lock:
+        _spans.append(span)
+        listeners = list(_listeners)
+
+    for listener in listeners:
+        listener(span)
+
+
+def _format_duration(seconds: float) -> str:
+    if seconds >= 1:
+        return f"{seconds:.2f} s"
+    return f"{seconds * 1000:.1f} ms"
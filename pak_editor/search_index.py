@@ -0,0 +1,356 @@
+"""Index of the files (and optionally the table values) of many .pak files.
+
+The index is stored in an SQLite database, so finding the pak that contains a file
+doesn't require opening every pak. Paks are only scanned again when their size or
+modification time changed.
+"""
+
+import os
+import sqlite3
+import tempfile
+from concurrent.futures import as_completed
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, Sequence
+
+from pak_editor.parsers import TABLE_EXTENSIONS, iter_table_chunks
+from pak_editor.parsers.pak_file import File, PakFile, ProgressCallback
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS paks (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    tables INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entries (
+    pak_id INTEGER NOT NULL REFERENCES paks (id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    checksum INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_name ON entries (name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS entries_pak_id ON entries (pak_id);
+CREATE TABLE IF NOT EXISTS cells (
+    pak_id INTEGER NOT NULL REFERENCES paks (id) ON DELETE CASCADE,
+    file TEXT NOT NULL,
+    row INTEGER NOT NULL,
+    column TEXT NOT NULL,
+    value TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cells_value ON cells (value COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS cells_pak_id ON cells (pak_id);
+"""
+
+# written by the workers, so the cells of a pak never have to be held in memory
+_SCAN_SCHEMA = """
+CREATE TABLE cells (
+    file TEXT NOT NULL,
+    row INTEGER NOT NULL,
+    column TEXT NOT NULL,
+    value TEXT NOT NULL
+);
+"""
+
+
+@dataclass
+class FileMatch:
+    pak: str
+    name: str
+    offset: int
+    length: int
+    checksum: int
+
+
+@dataclass
+class ValueMatch:
+    pak: str
+    file: str
+    row: int
+    column: str
+    value: str
+
+
+@dataclass
+class IndexStats:
+    scanned: int = 0
+    unchanged: int = 0
+    removed: int = 0
+    failed: dict[str, str] = field(default_factory=dict)
+
+    def __str__(self) -> str:
+        text = (
+            f"{self.scanned} pak(s) scanned, {self.unchanged} unchanged, "
+            f"{self.removed} removed"
+        )
+        if self.failed:
+            text += f", {len(self.failed)} failed"
+        return text
+
+
+@dataclass
+class _PakScan:
+    path: str
+    size: int
+    mtime_ns: int
+    tables: bool
+    entries: list[tuple[str, int, int, int]]
+    # database with the table cells, when tables were scanned
+    cells_path: str | None
+
+
+def find_paks(inputs: Iterable[str]) -> list[str]:
+    """Expands folders in `inputs` to the .pak files inside them."""
+    paths: list[str] = []
+
+    for path in inputs:
+        if os.path.isdir(path):
+            with os.scandir(path) as entries:
+                paths.extend(
+                    entry.path
+                    for entry in sorted(entries, key=lambda entry: entry.name)
+                    if entry.is_file() and entry.name.lower().endswith(".pak")
+                )
+        else:
+            paths.append(path)
+
+    return [os.path.abspath(path) for path in paths]
+
+
+def _table_cells(file: File) -> Iterator[tuple[str, int, str, str]]:
+    # tables are read in chunks, only their text values are kept
+    first_row = 0
+    for chunk in iter_table_chunks(file):
+        # numbers would mostly be noise like 0 and 1
+        for name, column in zip(chunk.names, chunk.columns):
+            yield from (
+                (file.name, first_row + row, name, value)
+                for row, value in enumerate(column)
+                if isinstance(value, str) and value
+            )
+        first_row += len(chunk)
+
+
+def _scan_pak(path: str, tables: bool, cells_path: str) -> _PakScan:
+    # runs in a worker process, parsing tables is mostly python code
+    stat = os.stat(path)
+    pak = PakFile.load(path)
+    try:
+        entries = [
+            (file.name, file.offset or 0, file.size, file.checksum_1 or 0)
+            for file in pak
+        ]
+        if tables:
+            _write_cells(pak, cells_path)
+    finally:
+        pak.close()
+
+    return _PakScan(
+        path,
+        stat.st_size,
+        stat.st_mtime_ns,
+        tables,
+        entries,
+        cells_path if tables else None,
+    )
+
+
+def _write_cells(pak: PakFile, path: str) -> None:
+    # the cells are inserted as the tables are read chunk by chunk
+    connection = sqlite3.connect(path, isolation_level=None)
+    try:
+        connection.executescript(_SCAN_SCHEMA)
+        connection.execute("BEGIN")
+        for file in pak:
+            if not file.name.lower().endswith(TABLE_EXTENSIONS):
+                continue
+
+            connection.execute("SAVEPOINT table_cells")
+            try:
+                connection.executemany(
+                    "INSERT INTO cells VALUES (?, ?, ?, ?)", _table_cells(file)
+                )
+            except Exception:
+                # broken tables can still be found by name
+                connection.execute("ROLLBACK TO table_cells")
+            connection.execute("RELEASE table_cells")
+        connection.execute("COMMIT")
+    finally:
+        connection.close()
+
+
+class SearchIndex:
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._connection = sqlite3.connect(path)
+        self._connection.execute("PRAGMA foreign_keys = ON")
+        # lets one connection search while another one updates the index
+        self._connection.execute("PRAGMA journal_mode = WAL")
+        self._connection.executescript(_SCHEMA)
+
+    def __enter__(self) -> "SearchIndex":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def paks(self) -> list[str]:
+        return [path for (path,) in self._connection.execute("SELECT path FROM paks")]
+
+    def update(
+        self,
+        paths: Sequence[str],
+        tables: bool = False,
+        workers: int | None = None,
+        progress: ProgressCallback | None = None,
+    ) -> IndexStats:
+        """Brings the index up to date with the paks at `paths`.
+
+        Paks are scanned in parallel by `workers` processes, but only if they are
+        new or their size or modification time changed. Paks that aren't part of
+        `paths` anymore are removed from the index. With `tables`, the text values
+        of all .bin and .dat tables are indexed as well.
+        """
+        stats = IndexStats()
+        paths = list(dict.fromkeys(os.path.abspath(path) for path in paths))
+
+        known = {
+            path: (size, mtime_ns, bool(indexed_tables))
+            for path, size, mtime_ns, indexed_tables in self._connection.execute(
+                "SELECT path, size, mtime_ns, tables FROM paks"
+            )
+        }
+
+        with self._connection:
+            for path in set(known) - set(paths):
+                self._connection.execute("DELETE FROM paks WHERE path = ?", (path,))
+                stats.removed += 1
+
+        outdated: list[str] = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError as e:
+                stats.failed[path] = str(e)
+                continue
+
+            if known.get(path) == (stat.st_size, stat.st_mtime_ns, tables):
+                stats.unchanged += 1
+            else:
+                outdated.append(path)
+
+        if not outdated:
+            return stats
+
+        # importing it pulls in multiprocessing, which is only needed from here on
+        from concurrent.futures import ProcessPoolExecutor
+
+        with (
+            tempfile.TemporaryDirectory(prefix="pak-editor-index-") as directory,
+            ProcessPoolExecutor(max_workers=workers) as executor,
+        ):
+            futures = {
+                executor.submit(
+                    _scan_pak, path, tables, os.path.join(directory, f"{idx}.sqlite")
+                ): path
+                for idx, path in enumerate(outdated)
+            }
+            try:
+                for done, future in enumerate(as_completed(futures), start=1):
+                    try:
+                        scan = future.result()
+                    except Exception as e:
+                        stats.failed[futures[future]] = str(e)
+                    else:
+                        self._store(scan)
+                        stats.scanned += 1
+
+                    if progress is not None:
+                        progress(done, len(futures))
+            except BaseException:
+                # doesn't wait for paks that haven't started when progress aborted
+                executor.shutdown(cancel_futures=True)
+                raise
+
+        return stats
+
+    def find_files(self, pattern: str, limit: int = 1000) -> list[FileMatch]:
+        """Files whose name matches the glob `pattern`, ignoring case."""
+        rows = self._connection.execute(
+            f"""
+            SELECT paks.path, entries.name, entries.offset, entries.length, entries.checksum
+            FROM entries JOIN paks ON paks.id = entries.pak_id
+            WHERE {_name_condition("entries.name", pattern)}
+            ORDER BY paks.path, entries.name
+            LIMIT ?
+            """,
+            (_like_pattern(pattern), limit),
+        )
+        return [FileMatch(*row) for row in rows]
+
+    def find_values(self, pattern: str, limit: int = 1000) -> list[ValueMatch]:
+        """Table cells whose value matches the glob `pattern`, ignoring case."""
+        rows = self._connection.execute(
+            f"""
+            SELECT paks.path, cells.file, cells.row, cells.column, cells.value
+            FROM cells JOIN paks ON paks.id = cells.pak_id
+            WHERE {_name_condition("cells.value", pattern)}
+            ORDER BY paks.path, cells.file, cells.row
+            LIMIT ?
+            """,
+            (_like_pattern(pattern), limit),
+        )
+        return [ValueMatch(*row) for row in rows]
+
+    def _store(self, scan: _PakScan) -> None:
+        # databases can't be attached inside a transaction
+        if scan.cells_path is not None:
+            self._connection.execute("ATTACH DATABASE ? AS scan", (scan.cells_path,))
+        try:
+            self._store_scan(scan)
+        finally:
+            if scan.cells_path is not None:
+                self._connection.execute("DETACH DATABASE scan")
+                os.remove(scan.cells_path)
+
+    def _store_scan(self, scan: _PakScan) -> None:
+        with self._connection:
+            self._connection.execute("DELETE FROM paks WHERE path = ?", (scan.path,))
+            cursor = self._connection.execute(
+                "INSERT INTO paks (path, size, mtime_ns, tables) VALUES (?, ?, ?, ?)",
+                (scan.path, scan.size, scan.mtime_ns, scan.tables),
+            )
+            pak_id = cursor.lastrowid
+
+            self._connection.executemany(
+                "INSERT INTO entries VALUES (?, ?, ?, ?, ?)",
+                ((pak_id, *entry) for entry in scan.entries),
+            )
+            if scan.cells_path is not None:
+                self._connection.execute(
+                    """
+                    INSERT INTO cells
+                    SELECT ?, file, row, column, value FROM scan.cells
+                    """,
+                    (pak_id,),
+                )
+
+
+def _name_condition(column: str, pattern: str) -> str:
+    # without wildcards it's a lookup in the NOCASE index, otherwise LIKE, which
+    # ignores case as well and still uses the index for a constant prefix
+    if any(char in pattern for char in "*?"):
+        return f"{column} LIKE ? ESCAPE '\\'"
+    return f"{column} = ? COLLATE NOCASE"
+
+
+def _like_pattern(pattern: str) -> str:
+    if not any(char in pattern for char in "*?"):
+        return pattern
+
+    escaped = pattern.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return escaped.replace("*", "%").replace("?", "_")
@@ -0,0 +1,234 @@
+"""Writes tables to Excel, JSON, NDJSON, CSV or Parquet files.
+
+All writers stream: they take the rows one at a time, either from a `Table`, a
+`BinReader`, a `DatReader` or any other iterable of rows, so huge tables can be
+exported with bounded memory.
+"""
+
+import csv
+import json
+import os
+import time
+from dataclasses import dataclass
+from itertools import islice
+from typing import Any, Iterable, Iterator, Sequence
+
+from pak_editor import profiling
+from pak_editor.parsers.bin_file import BinReader, BinTable, ColumnType, Header
+from pak_editor.parsers.dat_file import DatReader
+from pak_editor.parsers.table import Table
+
+Rows = Iterable[Sequence[Any]]
+
+FORMATS = ("xlsx", "json", "ndjson", "csv", "parquet")
+
+# rows converted to columns at once for parquet files
+_PARQUET_BATCH_SIZE = 65536
+
+
+@dataclass
+class TableExportStats:
+    rows: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """Written rows per second."""
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.rows} row(s), {self.bytes / 1_000_000:.1f} MB in "
+            f"{self.seconds:.2f}s ({self.throughput:,.0f} rows/s)"
+        )
+
+
+def format_from_path(path: str) -> str | None:
+    """Export format matching the extension of `path`, if any."""
+    format_ = os.path.splitext(path)[1].lower().lstrip(".")
+    return format_ if format_ in FORMATS else None
+
+
+def export_table(
+    path: str,
+    data: Table | BinReader | DatReader | Rows,
+    format_: str | None = None,
+    names: Sequence[str] | None = None,
+) -> TableExportStats:
+    """Writes the rows of `data` to `path`.
+
+    `format_` is one of `FORMATS` and defaults to the extension of `path`. `names`
+    are the column names, they only have to be passed for plain iterables of rows.
+    """
+    format_ = format_ or format_from_path(path)
+    if format_ not in FORMATS:
+        raise ValueError(f"unknown export format: {format_!r}")
+
+    headers: list[Header] | None = None
+    if isinstance(data, (BinTable, BinReader)):
+        headers = data.headers
+
+    if isinstance(data, (Table, BinReader, DatReader)):
+        names = data.names
+    elif names is None:
+        raise ValueError("names are required when exporting plain rows")
+
+    rows: Rows = data.iter_rows() if isinstance(data, Table) else data
+
+    with profiling.span(f"table.export.{format_}") as span:
+        start = time.perf_counter()
+        if format_ == "xlsx":
+            count = write_xlsx(path, names, rows)
+        elif format_ == "json":
+            count = write_json(path, names, rows)
+        elif format_ == "ndjson":
+            count = write_ndjson(path, names, rows)
+        elif format_ == "csv":
+            count = write_csv(path, names, rows)
+        else:
+            count = write_parquet(path, names, rows, headers)
+
+        span.add(rows=count)
+        return TableExportStats(
+            rows=count,
+            bytes=os.path.getsize(path),
+            seconds=time.perf_counter() - start,
+        )
+
+
+def write_xlsx(path: str, names: Sequence[str], rows: Rows) -> int:
+    import xlsxwriter
+
+    # constant memory mode flushes every row once the next one is written, which
+    # only works because the rows are written in order
+    workbook = xlsxwriter.Workbook(path, {"constant_memory": True})
+    try:
+        bold = workbook.add_format({"bold": True})
+        sheet = workbook.add_worksheet()
+        sheet.write_row(0, 0, names, bold)
+
+        count = 0
+        for count, row in enumerate(rows, start=1):
+            sheet.write_row(count, 0, row)
+    finally:
+        workbook.close()
+
+    return count
+
+
+def write_json(path: str, names: Sequence[str], rows: Rows) -> int:
+    """Array of one object per row, the same output as `json.dump` with an indent
+    of 4, without building the list first."""
+    encoder = json.JSONEncoder(indent=4, ensure_ascii=False)
+
+    count = 0
+    with open(path, "w", encoding="euc_kr") as fp:
+        fp.write("[")
+        for count, row in enumerate(rows, start=1):
+            fp.write(",\n    " if count > 1 else "\n    ")
+            fp.write(encoder.encode(dict(zip(names, row))).replace("\n", "\n    "))
+        fp.write("\n]" if count else "]")
+
+    return count
+
+
+def write_ndjson(path: str, names: Sequence[str], rows: Rows) -> int:
+    """One JSON object per line."""
+    encoder = json.JSONEncoder(ensure_ascii=False)
+
+    count = 0
+    with open(path, "w", encoding="utf-8") as fp:
+        for count, row in enumerate(rows, start=1):
+            fp.write(encoder.encode(dict(zip(names, row))))
+            fp.write("\n")
+
+    return count
+
+
+def write_csv(path: str, names: Sequence[str], rows: Rows) -> int:
+    count = 0
+    # the byte order mark makes Excel detect the encoding of korean text
+    with open(path, "w", encoding="utf-8-sig", newline="") as fp:
+        writer = csv.writer(fp)
+        writer.writerow(names)
+        for count, row in enumerate(rows, start=1):
+            writer.writerow(row)
+
+    return count
+
+
+def write_parquet(
+    path: str,
+    names: Sequence[str],
+    rows: Rows,
+    headers: list[Header] | None = None,
+) -> int:
+    """Needs pyarrow, which isn't installed by default. The column types are taken
+    from the `headers` of .bin tables or guessed from the first rows otherwise."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ValueError(
+            "exporting to parquet needs pyarrow, install it using 'pip install pyarrow'"
+        ) from e
+
+    schema = _arrow_schema(pa, headers) if headers is not None else None
+    writer = None
+    count = 0
+    try:
+        for batch in _batches(iter(rows), _PARQUET_BATCH_SIZE):
+            columns = list(zip(*batch))
+            if schema is None:
+                schema = pa.schema(
+                    [
+                        (name, _guess_arrow_type(pa, column))
+                        for name, column in zip(names, columns)
+                    ]
+                )
+            if writer is None:
+                writer = pq.ParquetWriter(path, schema)
+
+            writer.write_table(
+                pa.table(
+                    [
+                        pa.array(column, type=field.type)
+                        for column, field in zip(columns, schema)
+                    ],
+                    schema=schema,
+                )
+            )
+            count += len(batch)
+
+        if writer is None:
+            # no rows, the file still gets the columns
+            schema = schema or pa.schema([(name, pa.string()) for name in names])
+            writer = pq.ParquetWriter(path, schema)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    return count
+
+
+def _arrow_schema(pa: Any, headers: list[Header]) -> Any:
+    types = {
+        ColumnType.integer: pa.int32(),
+        ColumnType.float: pa.float64(),
+        ColumnType.bool: pa.bool_(),
+    }
+    return pa.schema(
+        [(header.name, types.get(header.c_type, pa.string())) for header in headers]
+    )
+
+
+def _guess_arrow_type(pa: Any, column: Sequence[Any]) -> Any:
+    type_ = pa.array(column).type
+    # columns without any values in the first rows are most likely text
+    return pa.string() if pa.types.is_null(type_) else type_
+
+
+def _batches(rows: Iterator[Sequence[Any]], size: int) -> Iterator[list[Sequence[Any]]]:
+    while batch := list(islice(rows, size)):
+        yield batch
@@ -0,0 +1,10 @@
+import pytest
+
+from benchmarks import verify
+
+
+@pytest.mark.parametrize(
+    "check", verify.checks(rows=2000), ids=lambda check: check.name
+)
+def test_serialize_gives_the_parsed_bytes(check: verify.Check) -> None:
+    assert verify.verify(check) is None
@@ -0,0 +1,9 @@
+import pytest
+
+from benchmarks import imports
+
+
+@pytest.mark.parametrize("startup", imports.STARTUPS, ids=lambda startup: startup.name)
+def test_import_stays_within_budget(startup: imports.Startup) -> None:
+    result = imports.measure_import(startup, repeat=3)
+    assert result.problems == []
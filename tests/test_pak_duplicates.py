@@ -0,0 +1,36 @@
+import struct
+
+from pak_editor.parsers.pak_file import File, PakFile
+
+ENTRIES = [("a.txt", b"one"), ("b.txt", b"two"), ("a.txt", b"three")]
+
+
+def _pak_bytes() -> bytes:
+    offset = 4 + 296 * len(ENTRIES)
+    headers = struct.pack("<I", len(ENTRIES))
+    for name, content in ENTRIES:
+        headers += struct.pack(
+            "<260sII24sI", name.encode(), offset, len(content), bytes(24), 0
+        )
+        offset += len(content)
+    return headers + b"".join(content for _, content in ENTRIES)
+
+
+def test_duplicate_names_are_written_back(tmp_path) -> None:
+    path = tmp_path / "duplicates.pak"
+    path.write_bytes(_pak_bytes())
+
+    pak = PakFile.load(str(path))
+    try:
+        assert [file.content for file in pak] == [b"one", b"two", b"three"]
+        assert pak.get("a.txt").content == b"one"
+        assert [file.content for file in pak.duplicates] == [b"three"]
+        assert pak.pack() == _pak_bytes()
+
+        pak.replace(File(name="b.txt", data=b"TWO"))
+        assert [file.content for file in pak] == [b"one", b"TWO", b"three"]
+
+        assert len(pak.remove_many(["a.txt"])) == 2
+        assert [file.name for file in pak] == ["b.txt"]
+    finally:
+        pak.close()
@@ -0,0 +1,5 @@
+from benchmarks import verify
+
+
+def test_failed_save_keeps_the_pak_usable() -> None:
+    assert verify.verify_failed_save() is None